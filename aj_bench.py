@@ -0,0 +1,323 @@
+# %%
+import importlib.util
+import os
+import re
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import date, timedelta
+
+import pandas as pd
+
+from aj_records import SnapshotHistory
+from aj_scrape_3 import WaybackJobScraper
+from aj_writers import CsvResultWriter
+
+
+# %%
+FIXTURE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE_EXTRACTORS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'tests', 'baseline_extractors.py')
+
+# Counts as printed in either layout: '<small>(632)</small>' or '</a> (632)'
+PRINTED_COUNT = re.compile(r'\((\d+)\)')
+
+
+def load_fixtures(directory=FIXTURE_DIRECTORY):
+    """
+    Read the fixture pages, named [synthetic_]<layout>_<timestamp>.html, as (name, timestamp, html)
+    in time order. The synthetic ones are hand-built rather than captured (see fixtures/README.md)
+    """
+    fixtures = []
+    for filename in os.listdir(directory):
+        if filename.endswith('.html'):
+            name, timestamp = filename[:-len('.html')].rsplit('_', 1)
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                fixtures.append((name, timestamp, f.read()))
+
+    return sorted(fixtures, key=lambda fixture: fixture[1])
+
+
+def synthetic_history(n, fixtures):
+    """
+    Yield n (timestamp, html) snapshots a day apart, built from the fixtures in order
+
+    Each page's links are re-pointed at its new timestamp and its counts nudged, so no two
+    sidebars are identical and the sidebar hash never short-circuits the parse
+    """
+    start = date(2013, 1, 1)
+
+    for i in range(n):
+        name, recorded, html = fixtures[i * len(fixtures) // n]
+        timestamp = (start + timedelta(days=i)).strftime('%Y%m%d') + '120000'
+
+        html = html.replace(f'/web/{recorded}/', f'/web/{timestamp}/')
+        yield timestamp, PRINTED_COUNT.sub(lambda m: f'({int(m.group(1)) + i % 97})', html)
+
+
+def best_time(call, repeat, rounds=5):
+    """
+    Seconds per call, taking the fastest of several rounds to keep scheduler noise out
+    """
+    return min(timeit.repeat(call, number=repeat, repeat=rounds)) / repeat
+
+
+def time_extraction(scraper, page, timestamp, repeat=200):
+    """
+    Seconds per extract_facets call on a sidebar that is already parsed
+    """
+    layout = scraper.detect_layout(page)
+    soup = scraper.parse_html(scraper.slice_sidebar(page, layout))
+
+    return best_time(lambda: scraper.extract_facets(soup, timestamp, layout), repeat)
+
+
+def load_baseline_extractors(path=BASELINE_EXTRACTORS):
+    """
+    Import tests/baseline_extractors.py, the extractors as they were before FacetMatcher and
+    extract_facets, copied verbatim
+    """
+    spec = importlib.util.spec_from_file_location('baseline_extractors', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def baseline_extraction(baseline, soup, timestamp, layout):
+    """
+    The three per-facet calls the baseline made for each page
+    """
+    suffix = '_legacy' if layout == 'legacy' else ''
+    return tuple(getattr(baseline, f"extract_{facet}_counts{suffix}")(soup, timestamp)
+                 for facet in ['job_type', 'sector', 'location'])
+
+
+def current_extraction(scraper, soup, timestamp, layout):
+    """
+    The same counts from one extract_facets walk
+    """
+    facets = scraper.extract_facets(soup, timestamp, layout)
+    return (scraper.job_type_counts(facets['job_type'], facets.get('job_type_kinds')),
+            facets['sector'], facets['location'])
+
+
+def bench_matching(repeat=200):
+    """
+    Print the per-page extraction cost of the baseline extractors against extract_facets,
+    both on the same full page parsed once with html.parser, and of extract_facets on the
+    pre-sliced sidebar that parse_snapshot hands it
+    """
+    baseline = load_baseline_extractors()
+    scraper = WaybackJobScraper(parser='html.parser')
+
+    print(f"{'fixture':<26} {'baseline us':>12} {'extract_facets us':>18} {'speedup':>8} {'sliced us':>10}")
+    for name, timestamp, html in load_fixtures():
+        layout = scraper.detect_layout(html)
+        soup = scraper.parse_html(html)
+        sidebar = scraper.parse_html(scraper.slice_sidebar(html, layout))
+
+        before = best_time(lambda: baseline_extraction(baseline, soup, timestamp, layout), repeat)
+        after = best_time(lambda: current_extraction(scraper, soup, timestamp, layout), repeat)
+        sliced = best_time(lambda: current_extraction(scraper, sidebar, timestamp, layout), repeat)
+        print(f"{name:<26} {before * 1e6:>12.1f} {after * 1e6:>18.1f} {before / after:>7.1f}x "
+              f"{sliced * 1e6:>10.1f}")
+
+
+def bench_extraction(repeat=200):
+    """
+    Print the per-page extraction cost of every installed parser backend on each fixture
+    """
+    fixtures = load_fixtures()
+
+    print(f"{'parser':<12} {'fixture':<26} {'us/page':>9}")
+    for parser in WaybackJobScraper.PARSER_BACKENDS:
+        scraper = WaybackJobScraper(parser=parser)
+        if scraper.parser != parser:
+            continue
+
+        for name, timestamp, html in fixtures:
+            seconds = time_extraction(scraper, html, timestamp, repeat)
+            print(f"{parser:<12} {name:<26} {seconds * 1e6:>9.1f}")
+
+
+def run_extraction(scraper, history):
+    """
+    Parse and extract every snapshot, returning the results and the seconds spent on each
+    """
+    seconds = {'parse': 0.0, 'extract': 0.0}
+    results = []
+
+    for timestamp, html in history:
+        start = time.perf_counter()
+        layout = scraper.detect_layout(html)
+        soup = scraper.parse_html(scraper.slice_sidebar(html, layout))
+        parsed = time.perf_counter()
+        facets = scraper.extract_facets(soup, timestamp, layout)
+        seconds['parse'] += parsed - start
+        seconds['extract'] += time.perf_counter() - parsed
+
+        results.append(scraper.snapshot_result(timestamp, facets))
+
+    return results, seconds
+
+
+def build_dataframes(scraper, results):
+    return (scraper.create_summary_dataframe(results),
+            scraper.create_sector_dataframe(results),
+            scraper.create_location_dataframe(results))
+
+
+def facet_dataframe_rows(results, result_key, name_column):
+    """
+    The facet DataFrame as built before create_facet_dataframe: one dict appended per row
+    """
+    rows = []
+    for result in results:
+        if 'error' not in result and result[result_key]:
+            for name, count in result[result_key].items():
+                rows.append({'timestamp': result['timestamp'], 'date': result['date'],
+                             name_column: name, 'job_count': count})
+    return pd.DataFrame(rows)
+
+
+def bench_dataframes(n=10000, parser='selectolax'):
+    """
+    Print the time and peak memory of building the sector and location DataFrames for a
+    synthetic history, row by row versus column-wise
+    """
+    scraper = WaybackJobScraper(parser=parser)
+    results, _ = run_extraction(scraper, synthetic_history(n, load_fixtures()))
+
+    builders = [
+        ('rows', lambda: [facet_dataframe_rows(results, 'sectors', 'sector'),
+                          facet_dataframe_rows(results, 'locations', 'location')]),
+        ('columns', lambda: [scraper.create_sector_dataframe(results),
+                             scraper.create_location_dataframe(results)]),
+    ]
+
+    print(f"{'builder':<8} {'rows':>8} {'seconds':>8} {'peak MiB':>9} {'frame MiB':>10}")
+    timings = {}
+    for name, build in builders:
+        dataframes, _, peak = measure(build, memory=True)
+        timings[name] = best_time(build, 1, rounds=3)
+        rows = sum(len(df) for df in dataframes)
+        size = sum(df.memory_usage(deep=True).sum() for df in dataframes)
+        print(f"{name:<8} {rows:>8} {timings[name]:>8.3f} {peak / 2 ** 20:>9.1f} {size / 2 ** 20:>10.1f}")
+
+    print(f"{n} snapshots: {timings['rows'] / timings['columns']:.1f}x faster column-wise")
+
+
+def extracted_results(scraper, history):
+    """
+    Yield the result of each snapshot as it is extracted, without keeping the pages
+    """
+    for timestamp, html in history:
+        layout = scraper.detect_layout(html)
+        soup = scraper.parse_html(scraper.slice_sidebar(html, layout))
+        yield scraper.snapshot_result(timestamp, scraper.extract_facets(soup, timestamp, layout))
+
+
+def retained_memory(build):
+    """
+    Return build()'s value and the traced bytes still allocated once it returns
+    """
+    tracemalloc.start()
+    value = build()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, retained
+
+
+def bench_history(n=10000, parser='selectolax'):
+    """
+    Print the memory a history of n results holds as result dicts versus a SnapshotHistory,
+    and the time to build the sector DataFrame from each
+    """
+    fixtures = load_fixtures()
+
+    results, dict_bytes = retained_memory(
+        lambda: list(extracted_results(WaybackJobScraper(parser=parser), synthetic_history(n, fixtures))))
+    scraper = WaybackJobScraper(parser=parser)
+    history, record_bytes = retained_memory(
+        lambda: SnapshotHistory(scraper, extracted_results(scraper, synthetic_history(n, fixtures))))
+
+    print(f"{'history':<8} {'MiB':>7} {'bytes/snapshot':>15} {'sector frame s':>15}")
+    for name, held, size in [('dicts', results, dict_bytes), ('history', history, record_bytes)]:
+        seconds = best_time(lambda: scraper.create_sector_dataframe(held), 1, rounds=3)
+        print(f"{name:<8} {size / 2 ** 20:>7.1f} {size / n:>15.0f} {seconds:>15.3f}")
+
+    print(f"{n} snapshots: {dict_bytes / record_bytes:.1f}x smaller as a SnapshotHistory")
+
+
+def write_csv(scraper, results, directory):
+    """
+    Stream the results to the three CSV outputs the way save_results does
+    """
+    writer = CsvResultWriter(scraper, os.path.join(directory, 'bench'))
+    for result in results:
+        writer.write(result)
+    writer.close()
+
+
+def measure(call, memory=False):
+    """
+    Run call once, returning its result, the seconds it took and, with memory=True,
+    its peak traced allocation in bytes (traced separately, as tracing slows the run)
+    """
+    start = time.perf_counter()
+    value = call()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return value, seconds, peak
+
+
+def bench_pipeline(sizes=(100, 1000, 10000), parser='html.parser', memory=True):
+    """
+    Time parsing, extraction, DataFrame building and CSV writing on synthetic histories
+    built from the fixtures, printing throughput and peak memory for each stage
+
+    Peak memory comes from a second, traced run of each stage; with memory=False the
+    10k history finishes in a couple of minutes rather than over ten
+    """
+    fixtures = load_fixtures()
+    scraper = WaybackJobScraper(parser=parser)
+
+    print(f"{'snapshots':>9} {'stage':<10} {'seconds':>8} {'per sec':>9} {'peak MiB':>9}")
+    for n in sizes:
+        stages = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            (results, seconds), _, peak = measure(
+                lambda: run_extraction(scraper, synthetic_history(n, fixtures)), memory)
+            stages.append(('parse', seconds['parse'], peak))
+            stages.append(('extract', seconds['extract'], peak))
+
+            _, seconds, peak = measure(lambda: build_dataframes(scraper, results), memory)
+            stages.append(('dataframes', seconds, peak))
+
+            _, seconds, peak = measure(lambda: write_csv(scraper, results, directory), memory)
+            stages.append(('csv', seconds, peak))
+
+        # Parsing and extraction share one pass, so they share its peak
+        for stage, seconds, peak in stages:
+            peak_text = f"{peak / 2 ** 20:>9.1f}" if peak is not None else f"{'-':>9}"
+            print(f"{n:>9} {stage:<10} {seconds:>8.2f} {n / seconds:>9.0f} {peak_text}")
+
+
+# %%
+if __name__ == "__main__":
+    bench_matching()
+    bench_extraction()
+    bench_dataframes()
+    bench_history()
+    bench_pipeline()
+
+# %%
@@ -0,0 +1,150 @@
+# %%
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+# %%
+class SnapshotCache:
+    """
+    Persistent store of raw snapshot HTML, one gzip file per Wayback timestamp.
+
+    Archived snapshots never change, so a cached page is valid forever. The CDX payload
+    digest of each timestamp is kept alongside, including captures that were never fetched
+    because an identical page was, so the cache can stand in for every one of them.
+    """
+
+    def __init__(self, directory='snapshot_cache'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # Digest of each timestamp, read from digests.jsonl on first use
+        self.digest_index = None
+
+    def path(self, timestamp):
+        return os.path.join(self.directory, f"{timestamp}.html.gz")
+
+    def __contains__(self, timestamp):
+        return os.path.exists(self.path(timestamp))
+
+    def get(self, timestamp):
+        """
+        Return the cached HTML for a timestamp, or None if it has not been fetched yet
+        """
+        try:
+            with gzip.open(self.path(timestamp), 'rt', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, timestamp, html):
+        """
+        Store the HTML for a timestamp
+        """
+        # Write to a temporary file first so concurrent readers never see a partial page
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, self.path(timestamp))
+
+    def timestamps(self):
+        """
+        List every cached timestamp in sorted order
+        """
+        return sorted(
+            name[:-len('.html.gz')] for name in os.listdir(self.directory)
+            if name.endswith('.html.gz'))
+
+    def digests_path(self):
+        return os.path.join(self.directory, 'digests.jsonl')
+
+    def load_digests(self):
+        if self.digest_index is not None:
+            return
+
+        self.digest_index = {}
+        try:
+            with open(self.digests_path(), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.digest_index[entry['timestamp']] = entry['digest']
+        except FileNotFoundError:
+            pass
+
+    def digests(self):
+        """
+        Return the recorded CDX digest of each timestamp, cached or not
+        """
+        with self.lock:
+            self.load_digests()
+            return dict(self.digest_index)
+
+    def put_digest(self, timestamp, digest):
+        """
+        Record the CDX digest of a timestamp, appending to digests.jsonl only if it is new
+        """
+        with self.lock:
+            self.load_digests()
+            if self.digest_index.get(timestamp) == digest:
+                return
+
+            with open(self.digests_path(), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'timestamp': timestamp, 'digest': digest}) + '\n')
+            self.digest_index[timestamp] = digest
+
+
+class CdxIndexCache:
+    """
+    Local copy of CDX snapshot timestamps, one JSON file per query, reused until it is ttl seconds old.
+
+    New captures keep appearing in the archive, so unlike snapshots the index does expire.
+    """
+
+    def __init__(self, directory='snapshot_cache', ttl=24 * 60 * 60):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, params):
+        key = json.dumps(params, sort_keys=True)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"cdx_index_{digest}.json")
+
+    def get(self, params):
+        """
+        Return the cached timestamps for a CDX query, or None if missing or expired
+        """
+        try:
+            with open(self.path(params), encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - index['fetched_at'] > self.ttl:
+            return None
+
+        return index['timestamps']
+
+    def get_digests(self, params):
+        """
+        Return the CDX payload digest of each cached timestamp, or {} if none were stored
+        """
+        try:
+            with open(self.path(params), encoding='utf-8') as f:
+                return json.load(f).get('digests', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def put(self, params, timestamps, digests=None):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'fetched_at': time.time(),
+                       'timestamps': timestamps, 'digests': digests or {}}, f)
+        os.replace(tmp_path, self.path(params))
@@ -0,0 +1,70 @@
+# %%
+import json
+import os
+import threading
+
+
+# %%
+class CheckpointJournal:
+    """
+    Append-only JSONL log of completed snapshots and their extracted counts.
+
+    Each line is one result dict, flushed to disk as soon as the snapshot completes,
+    so an interrupted run can resume without fetching those timestamps again.
+
+    Without a path, the journal is <base_filename>_progress.jsonl of the run it is passed
+    to, so each scraper resumes only from its own progress.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def for_output(self, base_filename):
+        """
+        Settle the path next to a run's outputs, unless one was given
+        """
+        if self.path is None:
+            self.path = f"{base_filename}_progress.jsonl"
+        return self
+
+    def load(self):
+        """
+        Return the results recorded so far, keyed by timestamp
+        """
+        results = {}
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by the interruption; that snapshot is simply redone
+                        continue
+                    results[result['timestamp']] = result
+        except FileNotFoundError:
+            pass
+
+        return results
+
+    def record(self, result):
+        """
+        Append one completed result and force it to disk
+        """
+        line = json.dumps(result) + '\n'
+
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """
+        Remove the journal once a run has finished
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,145 @@
+# %%
+import copy
+import difflib
+import re
+
+from aj_progress import logger
+
+
+# %%
+class FacetMatcher:
+    """
+    The patterns facet extraction needs, compiled once per scraper and shared by every extractor.
+
+    for_snapshot() returns a copy bound to one snapshot's /web/<timestamp>/ link prefix,
+    so the per-item checks in the extractors never rebuild a string or a regex.
+    """
+
+    COUNT = re.compile(r'\d+')
+    # Legacy pages print the count in parentheses after the link
+    LEGACY_COUNT = re.compile(r'\((\d+)\)')
+
+    def __init__(self, layouts):
+        self.header_patterns = {}
+        for layout in layouts.values():
+            for header_texts in layout['headers'].values():
+                for header_text in header_texts:
+                    self.header_pattern(header_text)
+
+        self.link_marker = None
+
+    def header_pattern(self, header_text):
+        """
+        Case-insensitive pattern for a section header, compiled on first use
+        """
+        pattern = self.header_patterns.get(header_text)
+        if pattern is None:
+            pattern = self.header_patterns[header_text] = re.compile(header_text, re.IGNORECASE)
+        return pattern
+
+    def for_snapshot(self, timestamp):
+        """
+        Share the compiled patterns with a matcher for links into one snapshot
+        """
+        matcher = copy.copy(self)
+        matcher.link_marker = f'/web/{timestamp}/'
+        return matcher
+
+    def links_here(self, href):
+        """
+        Whether a link points into this snapshot rather than another capture
+        """
+        return self.link_marker in href
+
+    def is_more_link(self, name, href):
+        """
+        Whether an item is a "More..." link rather than a facet value
+        """
+        return 'moreterms' in href or 'more' in name.lower()
+
+    def count(self, count_text):
+        count_match = self.COUNT.search(count_text)
+        return int(count_match.group()) if count_match else None
+
+    def legacy_count(self, item_text):
+        count_match = self.LEGACY_COUNT.search(item_text)
+        return int(count_match.group(1)) if count_match else None
+
+
+class FacetCanonicaliser:
+    """
+    Maps the names each site layout has used for a facet value to one canonical name,
+    so the saved data and facet ids line up across layouts, e.g. the legacy 'Greater London'
+    becomes 'London (Greater)'. Canonical names are those of the current site.
+
+    Each name is resolved once and cached. An unknown name is kept as it is, and on first
+    sight the closest canonical names are logged as suggestions for ALIASES.
+    """
+
+    ALIASES = {
+        'location': {
+            'Greater London': 'London (Greater)',
+            'East Midlands': 'East Midlands Region',
+            'Yorkshire and Humber': 'Yorkshire and the Humber',
+            'Republic of Ireland': 'Ireland',
+            'Channel Islands & Isle of Man': 'Crown Dependencies',
+        },
+    }
+
+    # Names the current site lists, which are never reported as unknown
+    CANONICAL = {
+        'location': [
+            'East Midlands Region', 'East of England', 'London (Greater)', 'North East England',
+            'North West England', 'Northern Ireland', 'Scotland', 'South East England',
+            'South West England', 'Wales', 'West Midlands', 'Yorkshire and the Humber',
+            'England', 'Crown Dependencies', 'Ireland', 'Europe', 'Africa', 'Asia', 'Asia Pacific',
+            'Middle East', 'North America', 'Oceania', 'Offshore', 'Homeworking', 'Nationwide',
+        ],
+        'sector': [
+            'Banking and finance', 'General insurance', 'Health', 'Hedge funds', 'IT', 'Investment',
+            'Life insurance', 'Management consultancy', 'Other', 'Pensions', 'Reinsurance',
+            'Risk management', 'Solvency II', 'Systems',
+        ],
+    }
+
+    def __init__(self, aliases=None, canonical=None, cutoff=0.6):
+        self.aliases = self.ALIASES if aliases is None else aliases
+        self.canonical_names = self.CANONICAL if canonical is None else canonical
+        # Minimum difflib similarity for a canonical name to be suggested
+        self.cutoff = cutoff
+        self.cache = {}
+        # Unknown (facet, name) pairs, with the canonical names they most resemble
+        self.suggestions = {}
+
+    def canonical(self, facet, name):
+        """
+        Canonical form of one facet value name
+        """
+        key = (facet, name)
+        canonical = self.cache.get(key)
+        if canonical is None:
+            canonical = self.cache[key] = self.resolve(facet, name)
+        return canonical
+
+    def resolve(self, facet, name):
+        canonical = self.aliases.get(facet, {}).get(name)
+        if canonical is not None:
+            return canonical
+
+        known = self.canonical_names.get(facet)
+        if known and name not in known:
+            self.suggestions[(facet, name)] = difflib.get_close_matches(name, known, n=3, cutoff=self.cutoff)
+            if self.suggestions[(facet, name)]:
+                logger.info(f"Unmapped {facet} '{name}' resembles {self.suggestions[(facet, name)]}; "
+                            f"add it to FacetCanonicaliser.ALIASES if it is the same")
+        return name
+
+    def canonical_counts(self, facet, counts):
+        """
+        A facet's {name: count} with canonical names, adding up values that share one
+        """
+        canonical_counts = {}
+        for name, count in counts.items():
+            name = self.canonical(facet, name)
+            canonical_counts[name] = canonical_counts.get(name, 0) + count
+        return canonical_counts
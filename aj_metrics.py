@@ -0,0 +1,161 @@
+# %%
+import json
+import threading
+from bisect import bisect_left
+
+from aj_progress import logger
+
+
+# %%
+class Histogram:
+    """
+    Bucketed distribution of observed values, exported as cumulative Prometheus-style buckets
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus the overflow (+Inf) slot
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """
+        (upper bound, observations at or below it) pairs, ending with '+Inf'
+        """
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {'buckets': {str(bound): count for bound, count in self.cumulative()},
+                'count': self.count, 'sum': self.sum}
+
+
+class ScraperMetrics:
+    """
+    Per-snapshot timings and counters of a scraping run, with aggregate histograms.
+
+    Every value is recorded against the snapshot timestamp it belongs to (None for requests
+    such as the CDX lookup), so a slow run can be traced to the network, the rate limiter
+    or the parser. Safe to share between the fetch threads.
+    """
+
+    SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    BYTES_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+
+    HISTOGRAMS = {
+        'fetch_seconds': SECONDS_BUCKETS,
+        'rate_limit_wait_seconds': SECONDS_BUCKETS,
+        'parse_seconds': SECONDS_BUCKETS,
+        'extract_seconds': SECONDS_BUCKETS,
+        'bytes': BYTES_BUCKETS,
+    }
+    COUNTERS = ['cache_hits', 'cache_misses', 'retries', 'sidebar_reuses', 'digest_reuses', 'errors']
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {name: Histogram(buckets) for name, buckets in self.HISTOGRAMS.items()}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.snapshots = {}
+
+    def record(self, timestamp, name, value):
+        # Repeated values for one snapshot, such as the waits of each retry, add up
+        if timestamp is not None:
+            snapshot = self.snapshots.setdefault(timestamp, {})
+            snapshot[name] = snapshot.get(name, 0) + value
+
+    def observe(self, timestamp, name, value):
+        """
+        Add a timing or size to its histogram and to the snapshot's record
+        """
+        with self.lock:
+            self.histograms[name].observe(value)
+            self.record(timestamp, name, value)
+
+    def count(self, timestamp, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+            self.record(timestamp, name, amount)
+
+    def pop(self, timestamp):
+        """
+        Remove and return one snapshot's record, to hand it from a parse worker to the main process
+        """
+        with self.lock:
+            return self.snapshots.pop(timestamp, {})
+
+    def merge(self, timestamp, snapshot):
+        """
+        Fold in a snapshot record popped from another ScraperMetrics
+        """
+        for name, value in snapshot.items():
+            if name in self.histograms:
+                self.observe(timestamp, name, value)
+            else:
+                self.count(timestamp, name, value)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.to_dict()
+                               for name, histogram in self.histograms.items()},
+                'snapshots': {timestamp: dict(snapshot)
+                              for timestamp, snapshot in self.snapshots.items()},
+            }
+
+    def to_json(self, path=None):
+        """
+        Return the metrics as JSON, also writing them to path if given
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, prefix='wayback_scraper'):
+        """
+        Render the counters and histograms in the Prometheus text exposition format
+        """
+        lines = []
+
+        with self.lock:
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+
+            for name, histogram in self.histograms.items():
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+                lines.append(f"{prefix}_{name}_sum {histogram.sum}")
+                lines.append(f"{prefix}_{name}_count {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def print_report(self):
+        """
+        Log where the time went, stage by stage
+        """
+        with self.lock:
+            # Logged as one message so concurrent output cannot interleave with it
+            lines = [f"\n=== SCRAPER METRICS ==="]
+            for name, histogram in self.histograms.items():
+                if name == 'bytes':
+                    lines.append(f"Downloaded: {histogram.sum / 2 ** 20:.1f} MiB in {histogram.count} responses")
+                elif histogram.count:
+                    lines.append(f"{name}: {histogram.sum:.1f}s total, "
+                                 f"{histogram.sum / histogram.count * 1000:.1f}ms mean over {histogram.count}")
+            lines.append(', '.join(f"{name}: {value}" for name, value in self.counters.items()))
+
+        logger.info('\n'.join(lines))
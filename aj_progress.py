@@ -0,0 +1,144 @@
+# %%
+import logging
+import sys
+import threading
+import time
+
+# Shared by every scraper module, so one call to configure_logging sets the verbosity
+logger = logging.getLogger('actuary_jobs')
+
+
+# %%
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressLine:
+    """
+    One throttled status line for a run: snapshots done out of the total, rate and ETA.
+
+    On a terminal the line is redrawn in place at most every `interval` seconds; in CI logs
+    and files a fresh line is written at most every `log_interval` seconds instead.
+    Updates may come from any thread. Nothing is drawn when the logger is quieter than INFO.
+    """
+
+    # The line currently on screen, so log records can be written above it
+    active = None
+
+    def __init__(self, total, label='Scraping', interval=0.5, log_interval=30, stream=None):
+        self.total = total
+        self.label = label
+        self.stream = stream or progress_stream()
+        self.tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.interval = interval if self.tty else log_interval
+        self.enabled = logger.isEnabledFor(logging.INFO)
+        self.lock = threading.RLock()
+        self.done = 0
+        self.start = time.monotonic()
+        self.last_draw = self.start
+        self.drawn = False
+
+        if self.enabled:
+            ProgressLine.active = self
+
+    def add_total(self, count):
+        with self.lock:
+            self.total += count
+
+    def update(self, count=1):
+        """
+        Count finished snapshots, redrawing the line if the interval has passed
+        """
+        with self.lock:
+            self.done += count
+            now = time.monotonic()
+            if self.enabled and now - self.last_draw >= self.interval:
+                self.draw(now)
+
+    def text(self, now):
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = format_duration((self.total - self.done) / rate) if rate > 0 else '--'
+        percent = 100 * self.done / self.total if self.total else 100
+
+        return (f"{self.label}: {self.done}/{self.total} ({percent:.0f}%), "
+                f"{rate:.2f}/s, ETA {eta}")
+
+    def draw(self, now=None):
+        now = now or time.monotonic()
+        self.last_draw = now
+
+        if self.tty:
+            self.stream.write('\r\x1b[K' + self.text(now))
+            self.drawn = True
+        else:
+            self.stream.write(self.text(now) + '\n')
+        self.stream.flush()
+
+    def clear(self):
+        """
+        Erase the line from a terminal so another message can take its place
+        """
+        if self.drawn:
+            self.stream.write('\r\x1b[K')
+            self.drawn = False
+
+    def close(self):
+        """
+        Draw the final state of the line and release the terminal
+        """
+        with self.lock:
+            if self.enabled:
+                self.draw()
+                if self.tty:
+                    self.stream.write('\n')
+                    self.drawn = False
+
+            if ProgressLine.active is self:
+                ProgressLine.active = None
+
+
+def progress_stream():
+    """
+    The stream configure_logging set up, so the progress line and messages share it
+    """
+    for handler in logger.handlers:
+        if isinstance(handler, ProgressAwareHandler):
+            return handler.stream
+    return sys.stderr
+
+
+class ProgressAwareHandler(logging.StreamHandler):
+    """
+    Stream handler that writes each record above the progress line rather than through it
+    """
+
+    def emit(self, record):
+        progress = ProgressLine.active
+        if progress is None or progress.stream is not self.stream:
+            super().emit(record)
+            return
+
+        with progress.lock:
+            redraw = progress.drawn
+            progress.clear()
+            super().emit(record)
+            if redraw:
+                progress.draw(progress.last_draw)
+
+
+def configure_logging(level=logging.INFO, quiet=False, stream=None):
+    """
+    Send the scraper's messages and progress line to stderr
+
+    level=logging.DEBUG adds a line per snapshot; quiet=True keeps only warnings and errors
+    and hides the progress line.
+    """
+    handler = ProgressAwareHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.WARNING if quiet else level)
+    logger.propagate = False
@@ -0,0 +1,196 @@
+# %%
+import asyncio
+import random
+import requests
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+# %%
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces request start times to a global requests-per-second cap
+    """
+
+    def __init__(self, requests_per_second=1.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        """
+        Block until the caller is allowed to start its next request
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+
+        # Sleep outside the lock so other workers can reserve their own slots
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket shared by every task on an event loop, refilled at `rate` tokens per second
+    """
+
+    def __init__(self, rate=1.0, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Wait until a token is available and take it
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                # Holding the lock keeps waiters queued in arrival order
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    RateLimiter whose rate climbs while the archive answers healthily and drops on throttling.
+
+    Each success raises the rate by `increase` times max_requests_per_second, up to that ceiling;
+    429/5xx responses cut it by `decrease`, and a Retry-After delay holds every worker back.
+    """
+
+    def __init__(self, requests_per_second=1.0, max_requests_per_second=None,
+                 min_requests_per_second=None, increase=0.05, decrease=0.5):
+        super().__init__(requests_per_second)
+        self.requests_per_second = requests_per_second
+        self.max_requests_per_second = max_requests_per_second or requests_per_second
+        self.min_requests_per_second = min_requests_per_second or (
+            requests_per_second / 16 if requests_per_second else None)
+        self.increase = increase
+        self.decrease = decrease
+
+    def set_rate(self, requests_per_second):
+        self.requests_per_second = requests_per_second
+        self.interval = 1.0 / requests_per_second
+
+    def record_success(self):
+        if not self.requests_per_second:
+            return
+        with self.lock:
+            self.set_rate(min(
+                self.max_requests_per_second,
+                self.requests_per_second + self.increase * self.max_requests_per_second))
+
+    def record_throttle(self, retry_after=None):
+        if not self.requests_per_second:
+            return
+        with self.lock:
+            self.set_rate(max(self.min_requests_per_second,
+                              self.requests_per_second * self.decrease))
+            if retry_after:
+                self.next_slot = max(self.next_slot, time.monotonic() + retry_after)
+
+
+class RetryPolicy:
+    """
+    Which failures to retry, how often, and the jittered exponential backoff between attempts
+    """
+
+    def __init__(self, max_retries=4, backoff_base=1.0, backoff_max=60.0,
+                 retry_statuses=(429, 500, 502, 503, 504)):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Seconds to wait before retry number `attempt` (0-based)
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+
+        # "Full jitter": spread retries from many workers over the whole backoff window
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def retry_after(self, response):
+        """
+        Read a Retry-After header given either as seconds or as an HTTP date
+        """
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised once the archive has kept failing through several circuit breaker trips
+    """
+
+
+class CircuitBreaker:
+    """
+    Pauses every worker after a run of consecutive failures instead of hammering a struggling archive.
+
+    Each trip holds requests back for reset_timeout seconds, doubling on every trip without a
+    success in between. After max_trips the breaker stays open and requests fail fast.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, max_trips=3):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_trips = max_trips
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Wait out an open circuit, or raise CircuitOpenError if the breaker has given up
+        """
+        with self.lock:
+            if self.trips >= self.max_trips:
+                raise CircuitOpenError(
+                    f"Circuit open after {self.trips} trips of {self.failure_threshold} consecutive failures")
+            delay = self.open_until - time.monotonic()
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.trips = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.failures = 0
+                self.trips += 1
+                self.open_until = time.monotonic() + self.reset_timeout * 2 ** (self.trips - 1)
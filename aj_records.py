@@ -0,0 +1,271 @@
+# %%
+import threading
+from array import array
+
+import numpy as np
+import pandas as pd
+
+
+# %%
+class FacetVocabulary:
+    """
+    Interns (facet, name) pairs as integer ids, so each sector or location string is held
+    once however many snapshots list it. Ids are stable for the life of the vocabulary.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = {}
+        # Facet and name of each id, by id
+        self.facets = []
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def id(self, facet, name):
+        key = (facet, name)
+        facet_id = self.ids.get(key)
+        if facet_id is None:
+            with self.lock:
+                facet_id = self.ids.get(key)
+                if facet_id is None:
+                    facet_id = self.ids[key] = len(self.names)
+                    self.facets.append(facet)
+                    self.names.append(name)
+        return facet_id
+
+
+class SnapshotRecord:
+    """
+    Compact form of one successful snapshot result.
+
+    Every facet count is held in two parallel fixed-width arrays, vocabulary ids and
+    counts, in page order. The date, Wayback URL and total are not stored, because they
+    follow from the rest. Build and unpack records with WaybackJobScraper.snapshot_record
+    and record_result.
+    """
+
+    __slots__ = ('timestamp', 'permanent_jobs', 'interim_jobs', 'ids', 'counts')
+
+    # Array typecodes: 16-bit ids allow 65,536 distinct facet names, 32-bit counts
+    ID_TYPE = 'H'
+    COUNT_TYPE = 'I'
+
+    def __init__(self, timestamp, permanent_jobs, interim_jobs, ids, counts):
+        self.timestamp = timestamp
+        self.permanent_jobs = permanent_jobs
+        self.interim_jobs = interim_jobs
+        self.ids = ids
+        self.counts = counts
+
+    @property
+    def total_jobs(self):
+        if self.permanent_jobs is None or self.interim_jobs is None:
+            return None
+        return self.permanent_jobs + self.interim_jobs
+
+    @classmethod
+    def from_result(cls, result, vocabulary, result_keys):
+        """
+        Pack a result dict, interning the names of each facet in result_keys (facet -> result key)
+        """
+        ids = []
+        counts = []
+        for facet, result_key in result_keys.items():
+            for name, count in result[result_key].items():
+                ids.append(vocabulary.id(facet, name))
+                counts.append(count)
+
+        # Built from lists so each array is allocated at its exact size
+        return cls(result['timestamp'], result['permanent_jobs'], result['interim_jobs'],
+                   array(cls.ID_TYPE, ids), array(cls.COUNT_TYPE, counts))
+
+    def facet_counts(self, vocabulary, facet):
+        """
+        The {name: count} dict of one facet, as in a result dict
+        """
+        return {vocabulary.names[facet_id]: count for facet_id, count in zip(self.ids, self.counts)
+                if vocabulary.facets[facet_id] == facet}
+
+
+class SnapshotHistory:
+    """
+    The results of a run packed into a few contiguous arrays, for keeping a long history
+    in memory. Every snapshot adds an integer timestamp, its two job type counts and an
+    offset, and its facet counts go on the end of one shared id array and one count array,
+    with ids from the scraper's vocabulary. Failed snapshots are kept as their error dicts.
+
+    The id and count arrays start 16-bit and widen to 32-bit if a value needs it.
+    Iterating yields ordinary result dicts, so a history can go anywhere a results list
+    can (save_results, print_summary). The scraper's DataFrame builders read the arrays directly.
+    """
+
+    # Stored in place of a job type count that was not found
+    MISSING = -1
+
+    def __init__(self, scraper, results=()):
+        self.scraper = scraper
+        self.result_keys = {facet: config['result_key'] for facet, config in scraper.FACETS.items()
+                            if 'result_key' in config}
+        # One entry per snapshot
+        self.timestamps = array('Q')
+        self.permanent_jobs = array('i')
+        self.interim_jobs = array('i')
+        # Where each snapshot's counts start in ids and counts, plus the end of the last
+        self.offsets = array('Q', [0])
+        # Vocabulary id and count of every facet name listed, snapshot after snapshot
+        self.ids = array('H')
+        self.counts = array('H')
+        # Error dicts of failed snapshots, by position
+        self.errors = {}
+        self.extend(results)
+
+    def append(self, result):
+        if 'error' in result:
+            self.errors[len(self.timestamps)] = result
+            self.timestamps.append(int(result['timestamp']))
+            self.permanent_jobs.append(self.MISSING)
+            self.interim_jobs.append(self.MISSING)
+            self.offsets.append(self.offsets[-1])
+            return
+
+        ids = []
+        counts = []
+        vocabulary = self.scraper.vocabulary
+        for facet, result_key in self.result_keys.items():
+            for name, count in result[result_key].items():
+                ids.append(vocabulary.id(facet, name))
+                counts.append(count)
+
+        if ids and max(ids) > 0xFFFF and self.ids.typecode == 'H':
+            self.ids = array('I', self.ids)
+        if counts and max(counts) > 0xFFFF and self.counts.typecode == 'H':
+            self.counts = array('I', self.counts)
+
+        self.timestamps.append(int(result['timestamp']))
+        for column, value in [(self.permanent_jobs, result['permanent_jobs']),
+                              (self.interim_jobs, result['interim_jobs'])]:
+            column.append(self.MISSING if value is None else value)
+        self.ids.extend(ids)
+        self.counts.extend(counts)
+        self.offsets.append(len(self.ids))
+
+    def extend(self, results):
+        for result in results:
+            self.append(result)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def record(self, position):
+        """
+        The SnapshotRecord of a successful snapshot, by position
+        """
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return SnapshotRecord(
+            str(self.timestamps[position]),
+            *[None if column[position] == self.MISSING else column[position]
+              for column in (self.permanent_jobs, self.interim_jobs)],
+            self.ids[start:end], self.counts[start:end])
+
+    def __iter__(self):
+        for position in range(len(self.timestamps)):
+            error = self.errors.get(position)
+            yield error if error is not None else self.scraper.record_result(self.record(position))
+
+    def columns(self):
+        """
+        The counts flattened: (row's snapshot position, row's vocabulary id, row's count).
+        Failed snapshots have no rows
+        """
+        lengths = np.diff(np.frombuffer(self.offsets, dtype=np.uint64)).astype(np.int64)
+        rows = np.repeat(np.arange(len(self.timestamps)), lengths)
+        ids = np.frombuffer(self.ids, dtype=self.ids.typecode).copy()
+        counts = np.frombuffer(self.counts, dtype=self.counts.typecode).copy()
+        return rows, ids, counts
+
+    def timestamp_strings(self, positions):
+        """
+        The timestamp of each snapshot position as a 14-digit string, and as readable_date formats it
+        """
+        numbers = np.frombuffer(self.timestamps, dtype=np.uint64)[positions]
+        timestamps = numbers.astype(str).astype(object)
+        dates = np.array([f"{t[:4]}-{t[4:6]}-{t[6:8]} {t[8:10]}:{t[10:12]}:{t[12:]}" for t in timestamps],
+                         dtype=object)
+
+        # Where strptime would reject the timestamp, readable_date keeps it as it is
+        days = (numbers // 10 ** 6).astype(np.int64)
+        month, day = days // 100 % 100, days % 100
+        month_start = (days // 10000 - 1970).astype('M8[Y]').astype('M8[M]') + (month - 1).astype('m8[M]')
+        clock = (numbers % 10 ** 6).astype(np.int64)
+        valid = ((numbers >= 10 ** 13) & (numbers < 10 ** 14) & (month >= 1) & (month <= 12) & (day >= 1)
+                 & ((month_start.astype('M8[D]') + (day - 1).astype('m8[D]')).astype('M8[M]') == month_start)
+                 & (clock // 10000 < 24) & (clock // 100 % 100 < 60) & (clock % 100 < 60))
+        dates[~valid] = timestamps[~valid]
+
+        return timestamps, dates
+
+    def in_facet(self, facet):
+        """
+        Boolean mask over vocabulary ids: whether each id belongs to the facet
+        """
+        return np.array(self.scraper.vocabulary.facets, dtype=object) == facet
+
+    def job_counts(self, column, kept):
+        return [None if column[position] == self.MISSING else column[position] for position in kept]
+
+    def summary_dataframe(self):
+        kept = [position for position in range(len(self.timestamps)) if position not in self.errors]
+        if not kept:
+            return pd.DataFrame()
+
+        rows, ids, counts = self.columns()
+        timestamps, dates = self.timestamp_strings(kept)
+        permanent_jobs = self.job_counts(self.permanent_jobs, kept)
+        interim_jobs = self.job_counts(self.interim_jobs, kept)
+
+        summary = {
+            'timestamp': timestamps,
+            'date': dates,
+            'permanent_jobs': permanent_jobs,
+            'interim_jobs': interim_jobs,
+            'total_jobs': [None if permanent is None or interim is None else permanent + interim
+                           for permanent, interim in zip(permanent_jobs, interim_jobs)],
+        }
+        for facet, column in [('sector', 'sectors_count'), ('location', 'locations_count')]:
+            summary[column] = np.bincount(
+                rows[self.in_facet(facet)[ids]], minlength=len(self.timestamps))[kept]
+        summary['wayback_url'] = [self.scraper.snapshot_url(timestamp) for timestamp in timestamps]
+
+        return pd.DataFrame(summary)
+
+    def facet_dataframe(self, facet):
+        """
+        One facet's long DataFrame, as built by WaybackJobScraper.create_facet_dataframe
+        with the facet as the name column
+        """
+        rows, ids, counts = self.columns()
+        keep = self.in_facet(facet)[ids] if len(ids) else np.zeros(0, dtype=bool)
+        if not keep.any():
+            return pd.DataFrame()
+
+        rows, ids = rows[keep], ids[keep]
+        vocabulary = self.scraper.vocabulary
+
+        # Categories in name order, as pd.Categorical would sort them
+        facet_ids = sorted(np.flatnonzero(self.in_facet(facet)), key=vocabulary.names.__getitem__)
+        codes = np.full(len(vocabulary), -1, dtype=np.int32)
+        codes[facet_ids] = np.arange(len(facet_ids))
+
+        # Only the snapshots with rows need their dates formatted
+        listed, rows = np.unique(rows, return_inverse=True)
+        timestamps, dates = self.timestamp_strings(listed)
+
+        return pd.DataFrame({
+            'timestamp': timestamps[rows],
+            'date': dates[rows],
+            facet: pd.Categorical.from_codes(
+                codes[ids], categories=[vocabulary.names[facet_id] for facet_id in facet_ids]),
+            'job_count': counts[keep].astype(np.int64),
+        })
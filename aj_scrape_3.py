@@ -2,16 +2,101 @@
 import requests
 import re
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
 import time
 import json
+import os
+import hashlib
+from itertools import chain
 from urllib.parse import quote
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from requests.adapters import HTTPAdapter
+
+from aj_cache import CdxIndexCache, SnapshotCache
+from aj_checkpoint import CheckpointJournal
+from aj_facets import FacetCanonicaliser, FacetMatcher
+from aj_metrics import ScraperMetrics
+from aj_progress import ProgressLine, configure_logging, logger
+from aj_records import FacetVocabulary, SnapshotHistory, SnapshotRecord
+from aj_rate_limit import AdaptiveRateLimiter, CircuitBreaker, RetryPolicy
+from aj_store import ResultStore
+from aj_timestamps import AdaptiveSampling, TimestampIndex, sampling_policy
+from aj_writers import CsvResultWriter, ParquetResultWriter, SqliteResultWriter, read_saved_output
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
 
 
 # %%
 class WaybackJobScraper:
-    def __init__(self, date_range=[None, None]):
+    # Facets of the filter sidebar and the result key their counts are stored under.
+    # Add an entry here, and its header text to each layout, to extract a new facet.
+    FACETS = {
+        'job_type': {},
+        'sector': {'result_key': 'sectors'},
+        'location': {'result_key': 'locations'},
+    }
+
+    # Page layouts the archive has served, checked in order. Each is recognised by a marker
+    # class in the raw HTML, which also bounds its sidebar, and names its extraction methods.
+    LAYOUTS = {
+        'current': {
+            # h4 (form 1) or button.category-header (form 2) headers over ul.filter__items
+            'marker': 'filter__items facet-links',
+            'header_tags': ['<h4', '<button'],
+            'headers': {
+                'job_type': ['Job type', 'Type', 'Employment type'],
+                'sector': ['Sector'],
+                'location': ['Location'],
+            },
+            'skip_more_links': ['location'],
+            # Link keywords marking a job type as permanent or interim whatever its name
+            'job_type_hrefs': {},
+            'extractors': {
+                'bs4': ('find_facet_headers', 'extract_facet_items'),
+                'selectolax': ('find_facet_headers_selectolax', 'extract_facet_items_selectolax'),
+            },
+        },
+        'legacy': {
+            # Pre-2016 pages: h3.collapsable headers over ul.expandList, counts in parentheses
+            'marker': 'expandList',
+            'header_tags': ['<h3'],
+            'headers': {
+                'job_type': ['Contract Type'],
+                'sector': ['Sector'],
+                'location': ['Location'],
+            },
+            'skip_more_links': [],
+            'job_type_hrefs': {
+                'permanent': ['permanent'],
+                'interim': ['interim-contract-and-temp'],
+            },
+            'extractors': {
+                'bs4': ('find_facet_headers_legacy', 'extract_facet_items_legacy'),
+                'selectolax': ('find_facet_headers_legacy_selectolax', 'extract_facet_items_legacy_selectolax'),
+            },
+        },
+    }
+
+    # HTML parser backends, fastest first. 'lxml' and 'html.parser' are BeautifulSoup tree builders
+    PARSER_BACKENDS = ['selectolax', 'lxml', 'html.parser']
+
+    # Output formats for save_results; parquet needs pyarrow
+    RESULT_WRITERS = {'csv': CsvResultWriter, 'parquet': ParquetResultWriter,
+                      'sqlite': SqliteResultWriter}
+
+    # Banner the archive injects into every page it serves
+    WAYBACK_TOOLBAR = re.compile(
+        r'<!-- BEGIN WAYBACK TOOLBAR INSERT -->.*?<!-- END WAYBACK TOOLBAR INSERT -->', re.S)
+
+    def __init__(self, date_range=[None, None], cache=None, parser='html.parser', layout=None,
+                 cdx_cache=None, sampling=None):
         self.base_url = "https://web.archive.org/web/"
         self.target_url = "https://www.theactuaryjobs.com/jobs/#browsing"
         self.wayback_api = "https://web.archive.org/cdx/search/cdx"
@@ -21,296 +106,1102 @@ class WaybackJobScraper:
         })
         self.date_range = date_range
         self.web_strings = None
+        # Optional SnapshotCache; pages found there are never requested from the archive
+        self.cache = cache
+        # Optional CdxIndexCache, and the number of CDX rows requested per page
+        self.cdx_cache = cdx_cache
+        self.cdx_page_size = 1000
+        self.parser = self.resolve_parser(parser)
+        # Layout name from LAYOUTS, or None to detect it on every page
+        self.layout = layout
+        # Header and count patterns compiled once for every extractor
+        self.matcher = FacetMatcher(self.LAYOUTS)
+        # Maps each layout's facet names to one canonical name as they are extracted
+        self.canonicaliser = FacetCanonicaliser()
+        # Prefix of the summary, sector and location CSV files
+        self.base_filename = 'wayback_job_stats'
+        # Politeness controls for snapshot requests; the limiter is set up per run
+        self.rate_limiter = None
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = CircuitBreaker()
+        # Per-snapshot timings and counters of the fetch, parse and extract stages
+        self.metrics = ScraperMetrics()
+        # Default SamplingPolicy (or period name) for run_scraper; None scrapes every snapshot
+        self.sampling = sampling
+        # Facets extracted from each distinct normalised sidebar, keyed by its hash
+        self.sidebar_facets = {}
+        # (soup, timestamp, facets) of the last soup passed to an extract_*_counts method
+        self.last_soup_facets = None
+        # CDX payload digest of each timestamp, and the first result seen for each digest
+        self.cdx_digests = {}
+        self.digest_results = {}
+        # Output format the latest run_scraper call read as incremental, so save_results merges
+        self.incremental_format = None
+        # Ids of every facet name seen, shared by the SnapshotRecords of this scraper
+        self.vocabulary = FacetVocabulary()
 
     def find_available_snapshots(self):
         """
         Find all available snapshots of the target URL using Wayback Machine's CDX API
+
+        The index is read page by page with resumeKey, streaming the plain-text rows, and
+        the date range is applied by the server. A CdxIndexCache answers repeat lookups locally.
         """
-        print("Searching for available snapshots...")
+        logger.info("Searching for available snapshots...")
+
+        params = self.cdx_params()
+        if self.cdx_cache is not None:
+            timestamps = self.cdx_cache.get(params)
+            if timestamps is not None:
+                self.cdx_digests.update(self.cdx_cache.get_digests(params))
+                logger.info(f"Found {len(timestamps)} snapshots in the local CDX index")
+                return timestamps
+
+        timestamps = []
+        page_params = dict(params, limit=self.cdx_page_size, showResumeKey='true')
+        digest_field = params['fl'].split(',').index('digest')
+
+        try:
+            while True:
+                resume_key = None
+
+                with self.get_with_retry(self.wayback_api, params=page_params, stream=True) as response:
+                    # Without a Content-Type charset requests would yield bytes, not text
+                    response.encoding = response.encoding or 'utf-8'
+                    lines = response.iter_lines(decode_unicode=True)
+                    for line in lines:
+                        # A blank line separates the rows from the key for the next page
+                        if not line:
+                            resume_key = next(lines, None)
+                            break
+
+                        fields = line.split(' ')
+                        timestamp = fields[0]
+                        if len(timestamp) == 14:  # Ensure it's the full 14-digit format
+                            timestamps.append(timestamp)
+                            self.cdx_digests[timestamp] = fields[digest_field]
+
+                if not resume_key:
+                    break
+                page_params['resumeKey'] = resume_key
+
+        except requests.RequestException as e:
+            # Keep what was found, but do not cache an incomplete index
+            logger.error(f"Error fetching snapshots: {e}")
+            return sorted(timestamps)
+
+        timestamps = sorted(timestamps)
+        logger.info(f"Found {len(timestamps)} snapshots")
+
+        if self.cdx_cache is not None:
+            self.cdx_cache.put(params, timestamps, {
+                timestamp: self.cdx_digests[timestamp] for timestamp in timestamps})
+
+        return timestamps
 
+    def cdx_params(self):
         params = {
             'url': self.target_url,
-            'output': 'json',
-            'fl': 'timestamp,original,statuscode',
+            'fl': 'timestamp,original,statuscode,digest',
             'filter': 'statuscode:200',
             'collapse': 'timestamp:8'  # Collapse to daily snapshots to reduce duplicates
         }
 
-        try:
-            response = self.session.get(
-                self.wayback_api, params=params, timeout=30)
-            response.raise_for_status()
+        # Let the server apply the date range
+        if self.date_range[0] is not None:
+            params['from'] = self.date_range[0].strftime('%Y%m%d%H%M%S')
+        if self.date_range[1] is not None:
+            params['to'] = self.date_range[1].strftime('%Y%m%d%H%M%S')
 
-            data = response.json()
+        return params
 
-            if not data:
-                print("No snapshots found")
-                return []
+    def filter_date_strings(self, results):
+        """
+        Keep the timestamps inside date_range; either end of the range may be None
+        """
+        filtered_date_range = list(TimestampIndex(results).range(*self.date_range))
+        self.web_strings = filtered_date_range
+        return (filtered_date_range)
 
-            # Skip the header row
-            snapshots = data[1:] if len(data) > 1 else []
+    def parser_available(self, parser):
+        if parser == 'selectolax':
+            return LexborHTMLParser is not None
+        return builder_registry.lookup(parser) is not None
 
-            timestamps = []
-            for snapshot in snapshots:
-                timestamp = snapshot[0]
-                if len(timestamp) == 14:  # Ensure it's the full 14-digit format
-                    timestamps.append(timestamp)
+    def resolve_parser(self, parser):
+        """
+        Use the requested parser backend, falling back to the pure-Python html.parser
+        """
+        if parser not in self.PARSER_BACKENDS:
+            raise ValueError(
+                f"Unknown parser {parser!r}, expected one of {self.PARSER_BACKENDS}")
 
-            print(f"Found {len(timestamps)} snapshots")
-            return sorted(timestamps)
+        if not self.parser_available(parser):
+            logger.warning(f"Parser {parser} is not installed, falling back to html.parser")
+            return 'html.parser'
 
-        except requests.RequestException as e:
-            print(f"Error fetching snapshots: {e}")
-            return []
+        return parser
 
-    def filter_date_strings(self, results):
-        date_range = self.date_range
-        filtered_date_range = [
-            date_string for date_string in results if
-            date_range[0] <= datetime.strptime(
-                date_string, "%Y%m%d%H%M%S") <= date_range[1]]
-        self.web_strings = filtered_date_range
-        return (filtered_date_range)
+    def detect_layout(self, html):
+        """
+        Pick the page layout by probing the raw HTML for each layout's marker class
+        """
+        if self.layout is not None:
+            return self.layout
+
+        for name, layout in self.LAYOUTS.items():
+            if layout['marker'] in html:
+                return name
+
+        return 'current'
+
+    def slice_sidebar(self, html, layout='current'):
+        """
+        Cut the raw HTML down to the filter sidebar, from the first facet header to the last facet list
+
+        Job cards, scripts and the Wayback toolbar are dropped before parsing, so the full DOM
+        is never built. The whole page is returned if the sidebar markers are missing.
+        """
+        marker = self.LAYOUTS[layout]['marker']
+
+        first_list = html.find(marker)
+        if first_list == -1:
+            return html
+
+        # Start at the header tag nearest the first list, so its header is kept but no
+        # earlier markup, such as a button in the masthead
+        list_start = html.rfind('<ul', 0, first_list)
+        header_starts = [(html.rfind(tag, 0, list_start), tag)
+                         for tag in self.LAYOUTS[layout]['header_tags']]
+        header_starts = [(start, tag) for start, tag in header_starts if start != -1]
+        if list_start == -1 or not header_starts:
+            return html
+
+        start = max(header_starts)[0]
+        # A header element still open there (an h4 inside a button) encloses the nearest tag
+        for tag_start, tag in header_starts:
+            if tag_start < start and html.find(f"</{tag[1:]}", tag_start) > start:
+                start = tag_start
+
+        last_list = html.rfind(marker)
+        end = html.find('</ul>', last_list)
+        end = len(html) if end == -1 else end + len('</ul>')
+
+        return html[start:end]
+
+    def parse_html(self, html, parser=None):
+        """
+        Build the document tree for a parser backend (defaults to the scraper's own)
+        """
+        parser = parser or self.parser
+        if parser == 'selectolax':
+            return LexborHTMLParser(html)
+        return BeautifulSoup(html, parser)
 
-    def find_section_header(self, soup, header_text):
+    def find_facet_headers(self, soup):
+        """
+        Collect every candidate section header (h4 or button.category-header) in one pass
+        """
+        h4_headers = []
+        button_headers = []
+
+        # A plain walk; find_all(['h4', 'button']) costs several times more per node
+        for tag in soup.descendants:
+            if tag.name == 'h4':
+                # Form 1: header text is the h4's own string
+                if tag.string is not None:
+                    h4_headers.append((str(tag.string), tag))
+            elif tag.name == 'button' and 'category-header' in tag.get('class', []):
+                # Form 2: header text might be nested inside the button
+                button_headers.append((tag.get_text(strip=True), tag))
+
+        return h4_headers, button_headers
+
+    def find_section_header(self, headers, header_text):
         """Find section header - handles both h4 and button elements"""
-        # Try h4 first (form 1)
-        header = soup.find('h4', string=re.compile(header_text, re.IGNORECASE))
-        if header:
-            return header
+        h4_headers, button_headers = headers
+        pattern = self.matcher.header_pattern(header_text)
 
-        # Try button (form 2) - text might be nested inside
-        buttons = soup.find_all('button', class_='category-header')
-        for button in buttons:
-            if re.search(header_text, button.get_text(strip=True), re.IGNORECASE):
-                return button
+        # Try h4 first (form 1), then button (form 2)
+        for text, header in h4_headers + button_headers:
+            if pattern.search(text):
+                return header
 
         return None
 
-    def extract_job_type_counts(self, soup, timestamp):
+    def extract_facet_items(self, header, matcher, skip_more_links=False, hrefs=None):
         """
-        Extract permanent and interim job counts from the HTML content
+        Extract the name -> count pairs listed under a section header, and the link of each
+        into hrefs if given
+        """
+        counts = {}
+
+        # Find the associated content div
+        content_div = header.find_next_sibling('div')
+        if not content_div:
+            return counts
+
+        filter_ul = content_div.find(
+            'ul', class_='filter__items facet-links indent block lap-larger')
+        if not filter_ul:
+            return counts
+
+        filter_items = filter_ul.find_all(
+            'li', class_='filter__item facet-links__link lap-larger__item')
+
+        for item in filter_items:
+            found = self.first_descendants(item, ('a', 'small'))
+            link = found.get('a')
+            small_tag = found.get('small')
+
+            if link and small_tag:
+                href = link.get('href', '')
+                name = link.get_text(strip=True)
+                count_text = small_tag.get_text(strip=True)
+
+                # Skip "More..." links
+                if skip_more_links and matcher.is_more_link(name, href):
+                    continue
+
+                # Extract number from count text
+                count = matcher.count(count_text)
+                if count is not None and matcher.links_here(href):
+                    counts[name] = count
+                    if hrefs is not None:
+                        hrefs[name] = href
+
+        return counts
+
+    def first_descendants(self, tag, names):
+        """
+        The first descendant tag of each name, as tag.find(name) returns it, in one walk
+
+        Per-item lookups are the bulk of extraction, and bs4's find builds a filter per call
+        """
+        found = {}
+        for node in tag.descendants:
+            if node.name in names and node.name not in found:
+                found[node.name] = node
+                if len(found) == len(names):
+                    break
+        return found
+
+    def node_string(self, node):
+        """
+        Mirror BeautifulSoup's Tag.string for a selectolax node: the text of a lone text descendant
+        """
+        while True:
+            children = list(node.iter(include_text=True))
+            if len(children) != 1:
+                return None
+
+            node = children[0]
+            if node.tag == '-text':
+                return node.text_content
+            if node.tag == '-comment':
+                return None
+
+    def find_facet_headers_selectolax(self, tree):
+        """
+        Collect the h4 and button.category-header section headers using CSS selectors
+        """
+        h4_headers = []
+        for tag in tree.css('h4'):
+            text = self.node_string(tag)
+            if text is not None:
+                h4_headers.append((text, tag))
+
+        button_headers = [
+            (tag.text(deep=True, separator='', strip=True), tag)
+            for tag in tree.css('button.category-header')]
+
+        return h4_headers, button_headers
+
+    def extract_facet_items_selectolax(self, header, matcher, skip_more_links=False, hrefs=None):
+        """
+        Extract the name -> count pairs (and links into hrefs) listed under a section header
+        using CSS selectors
+        """
+        counts = {}
+
+        # Find the associated content div
+        content_div = header.next
+        while content_div is not None and content_div.tag != 'div':
+            content_div = content_div.next
+        if content_div is None:
+            return counts
+
+        filter_ul = content_div.css_first(
+            'ul[class="filter__items facet-links indent block lap-larger"]')
+        if filter_ul is None:
+            return counts
+
+        for item in filter_ul.css('li[class="filter__item facet-links__link lap-larger__item"]'):
+            link = item.css_first('a')
+            small_tag = item.css_first('small')
+
+            if link and small_tag:
+                href = link.attributes.get('href') or ''
+                name = link.text(deep=True, separator='', strip=True)
+                count_text = small_tag.text(deep=True, separator='', strip=True)
+
+                # Skip "More..." links
+                if skip_more_links and matcher.is_more_link(name, href):
+                    continue
+
+                # Extract number from count text
+                count = matcher.count(count_text)
+                if count is not None and matcher.links_here(href):
+                    counts[name] = count
+                    if hrefs is not None:
+                        hrefs[name] = href
+
+        return counts
+
+    def find_facet_headers_legacy(self, soup):
+        """
+        Collect the h3.collapsable section headers of the legacy layout in one pass
+        """
+        headers = [
+            (str(tag.string), tag) for tag in soup.descendants
+            if tag.name == 'h3' and 'collapsable' in tag.get('class', []) and tag.string is not None]
+
+        return headers, []
+
+    def extract_facet_items_legacy(self, header, matcher, skip_more_links=False, hrefs=None):
+        """
+        Extract the name -> count pairs (and links into hrefs) listed under a legacy section header
+        """
+        counts = {}
+
+        # Find the associated div and ul
+        content_div = header.find_next_sibling('div')
+        if not content_div:
+            return counts
+
+        expand_list = content_div.find('ul', class_='expandList')
+        if not expand_list:
+            return counts
+
+        for item in expand_list.find_all('li'):
+            link = self.first_descendants(item, ('a',)).get('a')
+            if link:
+                href = link.get('href', '')
+                name = link.get_text(strip=True)
+
+                # Look for count in parentheses after the link
+                count = matcher.legacy_count(item.get_text())
+                if count is not None and matcher.links_here(href):
+                    counts[name] = count
+                    if hrefs is not None:
+                        hrefs[name] = href
+
+        return counts
+
+    def find_facet_headers_legacy_selectolax(self, tree):
+        """
+        Collect the h3.collapsable section headers of the legacy layout using CSS selectors
+        """
+        headers = []
+        for tag in tree.css('h3.collapsable'):
+            text = self.node_string(tag)
+            if text is not None:
+                headers.append((text, tag))
+
+        return headers, []
+
+    def extract_facet_items_legacy_selectolax(self, header, matcher, skip_more_links=False, hrefs=None):
+        """
+        Extract the name -> count pairs (and links into hrefs) listed under a legacy section
+        header using CSS selectors
+        """
+        counts = {}
+
+        # Find the associated div and ul
+        content_div = header.next
+        while content_div is not None and content_div.tag != 'div':
+            content_div = content_div.next
+        if content_div is None:
+            return counts
+
+        expand_list = content_div.css_first('ul.expandList')
+        if expand_list is None:
+            return counts
+
+        for item in expand_list.css('li'):
+            link = item.css_first('a')
+            if link:
+                href = link.attributes.get('href') or ''
+                name = link.text(deep=True, separator='', strip=True)
+
+                # Look for count in parentheses after the link
+                count = matcher.legacy_count(item.text(deep=True))
+                if count is not None and matcher.links_here(href):
+                    counts[name] = count
+                    if hrefs is not None:
+                        hrefs[name] = href
+
+        return counts
+
+    def extract_facets(self, soup, timestamp, layout='current'):
+        """
+        Extract the counts of every facet in FACETS with a single walk over the section headers,
+        under their canonical names
+
+        Where the layout has job_type_hrefs, 'job_type_kinds' maps each job type whose link
+        marks it as permanent or interim to that kind
+        """
+        layout = self.LAYOUTS[layout]
+        backend = 'bs4' if isinstance(soup, BeautifulSoup) else 'selectolax'
+        find_headers, extract_items = (
+            getattr(self, name) for name in layout['extractors'][backend])
+
+        headers = find_headers(soup)
+        matcher = self.matcher.for_snapshot(timestamp)
+        facets = {}
+
+        for facet in self.FACETS:
+            counts = {}
+            skip_more_links = facet in layout['skip_more_links']
+            hrefs = {} if facet == 'job_type' and layout['job_type_hrefs'] else None
+
+            # Use the first header that yields any counts
+            for header_text in layout['headers'].get(facet, []):
+                header = self.find_section_header(headers, header_text)
+                if header:
+                    counts = extract_items(header, matcher, skip_more_links, hrefs)
+                    if counts:
+                        break
+
+            facets[facet] = self.canonicaliser.canonical_counts(facet, counts)
+
+            if hrefs is not None:
+                facets['job_type_kinds'] = self.job_type_kinds(hrefs, layout['job_type_hrefs'])
+
+        return facets
+
+    def job_type_kinds(self, hrefs, job_type_hrefs):
+        """
+        Map each job type whose link contains one of a kind's keywords to that kind,
+        permanent taking precedence
+        """
+        kinds = {}
+        for name, href in hrefs.items():
+            for kind, keywords in job_type_hrefs.items():
+                if any(keyword in href for keyword in keywords):
+                    kinds[self.canonicaliser.canonical('job_type', name)] = kind
+                    break
+        return kinds
+
+    def job_type_counts(self, job_type_facet, kinds=None):
+        """
+        Split the job type facet into permanent and interim job counts, by name or by the
+        kinds extract_facets read from the links
         """
         permanent_count = None
         interim_count = None
+        kinds = kinds or {}
 
-        # Look for the job type section - could be under different headers
-        possible_headers = ['Job type', 'Type', 'Employment type']
-
-        for header_text in possible_headers:
-            header = self.find_section_header(soup, header_text)
-            if header:
-                # Find the associated ul element
-                content_div = header.find_next_sibling('div')
-                if content_div:
-                    filter_ul = content_div.find(
-                        'ul', class_='filter__items facet-links indent block lap-larger')
-
-                    if filter_ul:
-                        filter_items = filter_ul.find_all(
-                            'li', class_='filter__item facet-links__link lap-larger__item')
-
-                        for item in filter_items:
-                            link = item.find('a')
-                            small_tag = item.find('small')
-
-                            if link and small_tag:
-                                href = link.get('href', '')
-                                text = link.get_text(strip=True).lower()
-                                count_text = small_tag.get_text(strip=True)
-
-                                # Extract number from count text
-                                count_match = re.search(r'\d+', count_text)
-                                if count_match:
-                                    count = int(count_match.group())
-
-                                    # Check if this is permanent jobs
-                                    if 'permanent' in text and f'/web/{timestamp}/' in href:
-                                        permanent_count = count
-
-                                    # Check if this is interim/contract jobs
-                                    elif any(keyword in text for keyword in ['interim', 'contract', 'temp']) and f'/web/{timestamp}/' in href:
-                                        interim_count = count
-
-                        if permanent_count is not None and interim_count is not None:
-                            break
+        for name, count in job_type_facet.items():
+            text = name.lower()
+            kind = kinds.get(name)
+
+            # Check if this is permanent jobs
+            if 'permanent' in text or kind == 'permanent':
+                permanent_count = count
+
+            # Check if this is interim/contract jobs
+            elif any(keyword in text for keyword in ['interim', 'contract', 'temp']) or kind == 'interim':
+                interim_count = count
 
         return permanent_count, interim_count
 
+    def soup_facets(self, soup, timestamp):
+        """
+        extract_facets in the scraper's layout, kept for the last soup so the three
+        extract_*_counts calls on one page share a single walk
+        """
+        last = self.last_soup_facets
+        if last is None or last[0] is not soup or last[1] != timestamp:
+            last = self.last_soup_facets = (
+                soup, timestamp, self.extract_facets(soup, timestamp, self.layout or 'current'))
+        return last[2]
+
+    def extract_job_type_counts(self, soup, timestamp):
+        """
+        Extract permanent and interim job counts from the HTML content
+        """
+        facets = self.soup_facets(soup, timestamp)
+        return self.job_type_counts(facets['job_type'], facets.get('job_type_kinds'))
+
     def extract_sector_counts(self, soup, timestamp):
         """
         Extract job counts by sector
         """
-        sector_counts = {}
-
-        # Look for the Sector header
-        sector_header = self.find_section_header(soup, 'Sector')
+        return dict(self.soup_facets(soup, timestamp)['sector'])
 
-        if sector_header:
-            # Find the associated content div
-            content_div = sector_header.find_next_sibling('div')
-            if content_div:
-                filter_ul = content_div.find(
-                    'ul', class_='filter__items facet-links indent block lap-larger')
+    def extract_location_counts(self, soup, timestamp):
+        """
+        Extract job counts by location
+        """
+        return dict(self.soup_facets(soup, timestamp)['location'])
 
-                if filter_ul:
-                    filter_items = filter_ul.find_all(
-                        'li', class_='filter__item facet-links__link lap-larger__item')
+    def snapshot_url(self, timestamp):
+        return f"{self.base_url}{timestamp}/{self.target_url}"
 
-                    for item in filter_items:
-                        link = item.find('a')
-                        small_tag = item.find('small')
+    def parse_snapshot(self, html, timestamp):
+        """
+        Extract all job data from the HTML of a snapshot and build its result dict
+        """
+        start = time.perf_counter()
+        layout = self.detect_layout(html)
+        sidebar = self.slice_sidebar(html, layout)
+
+        # Extract job type, sector and location counts in one pass, unless an earlier
+        # capture had the same sidebar
+        digest = self.sidebar_digest(sidebar, timestamp, layout)
+        facets = self.sidebar_facets.get(digest)
+        if facets is None:
+            soup = self.parse_html(sidebar)
+            parsed = time.perf_counter()
+            facets = self.extract_facets(soup, timestamp, layout)
+            self.metrics.observe(timestamp, 'parse_seconds', parsed - start)
+            self.metrics.observe(timestamp, 'extract_seconds', time.perf_counter() - parsed)
+            self.sidebar_facets[digest] = facets
+        else:
+            self.metrics.count(timestamp, 'sidebar_reuses')
+            logger.debug(f"  {timestamp}: sidebar unchanged from an earlier snapshot, reusing its counts")
+        facets = {facet: dict(counts) for facet, counts in facets.items()}
+
+        return self.snapshot_result(timestamp, facets)
+
+    def snapshot_result(self, timestamp, facets):
+        """
+        Build the result dict of a snapshot from its extracted facets
+        """
+        permanent_count, interim_count = self.job_type_counts(
+            facets['job_type'], facets.get('job_type_kinds'))
+        sector_counts = facets['sector']
+        location_counts = facets['location']
+
+        result = {
+            'timestamp': timestamp,
+            'date': self.readable_date(timestamp),
+            'wayback_url': self.snapshot_url(timestamp),
+            'permanent_jobs': permanent_count,
+            'interim_jobs': interim_count,
+            'total_jobs': (permanent_count or 0) + (interim_count or 0) if permanent_count is not None and interim_count is not None else None,
+            'sectors': sector_counts,
+            'locations': location_counts
+        }
 
-                        if link and small_tag:
-                            href = link.get('href', '')
-                            sector_name = link.get_text(strip=True)
-                            count_text = small_tag.get_text(strip=True)
+        # Any further facets are stored under their own result key
+        for facet, config in self.FACETS.items():
+            if 'result_key' in config:
+                result.setdefault(config['result_key'], facets[facet])
 
-                            # Extract number from count text
-                            count_match = re.search(r'\d+', count_text)
-                            if count_match and f'/web/{timestamp}/' in href:
-                                count = int(count_match.group())
-                                sector_counts[sector_name] = count
+        logger.debug(
+            f"  {timestamp}: Permanent {permanent_count}, Interim {interim_count}, "
+            f"{len(sector_counts)} sectors, {len(location_counts)} locations")
 
-        return sector_counts
+        return result
 
-    def extract_location_counts(self, soup, timestamp):
+    def snapshot_record(self, result):
         """
-        Extract job counts by location
+        Pack a successful result dict into a SnapshotRecord
         """
-        location_counts = {}
+        return SnapshotRecord.from_result(result, self.vocabulary, {
+            facet: config['result_key'] for facet, config in self.FACETS.items()
+            if 'result_key' in config})
 
-        # Look for the Location header
-        location_header = self.find_section_header(soup, 'Location')
+    def record_result(self, record, timestamp=None):
+        """
+        Unpack a SnapshotRecord into a result dict, optionally as a capture at another timestamp
+        """
+        timestamp = timestamp or record.timestamp
+        result = {
+            'timestamp': timestamp,
+            'date': self.readable_date(timestamp),
+            'wayback_url': self.snapshot_url(timestamp),
+            'permanent_jobs': record.permanent_jobs,
+            'interim_jobs': record.interim_jobs,
+            'total_jobs': record.total_jobs,
+        }
+        for facet, config in self.FACETS.items():
+            if 'result_key' in config:
+                result[config['result_key']] = record.facet_counts(self.vocabulary, facet)
+        return result
 
-        if location_header:
-            # Find the associated content div
-            content_div = location_header.find_next_sibling('div')
-            if content_div:
-                filter_ul = content_div.find(
-                    'ul', class_='filter__items facet-links indent block lap-larger')
+    def readable_date(self, timestamp):
+        """
+        Convert timestamp to readable date
+        """
+        try:
+            date_obj = datetime.strptime(timestamp, '%Y%m%d%H%M%S')
+            return date_obj.strftime('%Y-%m-%d %H:%M:%S')
+        except:
+            return timestamp
 
-                if filter_ul:
-                    filter_items = filter_ul.find_all(
-                        'li', class_='filter__item facet-links__link lap-larger__item')
+    def sidebar_digest(self, sidebar, timestamp, layout):
+        """
+        Hash a sliced sidebar with the Wayback toolbar and the snapshot's own /web/<timestamp>/
+        link prefix removed, so captures of an unchanged page hash the same
+        """
+        # Only the own prefix is masked: extraction keeps links to that timestamp alone
+        sidebar = self.WAYBACK_TOOLBAR.sub('', sidebar).replace(f'/web/{timestamp}/', '/web/-/')
+        return hashlib.sha1(f"{layout}\n{sidebar}".encode('utf-8')).hexdigest()
 
-                    for item in filter_items:
-                        link = item.find('a')
-                        small_tag = item.find('small')
+    def reuse_archived_result(self, timestamp):
+        """
+        Copy the result of an earlier capture the CDX index reports as identical, or return None
+        """
+        digest = self.cdx_digests.get(timestamp)
+        earlier = self.digest_results.get(digest) if digest is not None else None
+        if earlier is None:
+            return None
 
-                        if link and small_tag:
-                            href = link.get('href', '')
-                            location_name = link.get_text(strip=True)
-                            count_text = small_tag.get_text(strip=True)
+        logger.debug(f"Snapshot {timestamp} matches the archived digest of {earlier.timestamp}, skipping fetch")
+        self.metrics.count(timestamp, 'digest_reuses')
+        self.cache_digest(timestamp)
+        return self.record_result(earlier, timestamp)
 
-                            # Skip "More..." links
-                            if 'more' in location_name.lower() or 'moreterms' in href:
-                                continue
+    def cache_digest(self, timestamp):
+        """
+        Keep a timestamp's CDX digest with the cached pages, so reparse_cache can rebuild
+        captures that were never fetched because an identical one was
+        """
+        digest = self.cdx_digests.get(timestamp)
+        if self.cache is not None and digest is not None:
+            self.cache.put_digest(timestamp, digest)
 
-                            # Extract number from count text
-                            count_match = re.search(r'\d+', count_text)
-                            if count_match and f'/web/{timestamp}/' in href:
-                                count = int(count_match.group())
-                                location_counts[location_name] = count
+    def remember_result(self, result):
+        """
+        Keep a successful result for later captures with the same CDX digest
+        """
+        digest = self.cdx_digests.get(result['timestamp'])
+        if digest is not None and 'error' not in result and digest not in self.digest_results:
+            self.digest_results[digest] = self.snapshot_record(result)
 
-        return location_counts
+    def error_result(self, timestamp, error):
+        """
+        Build the result row recorded for a snapshot that could not be fetched
+        """
+        logger.warning(f"  Error scraping {timestamp}: {error}")
+        self.metrics.count(timestamp, 'errors')
+        return {
+            'timestamp': timestamp,
+            'date': None,
+            'wayback_url': self.snapshot_url(timestamp),
+            'permanent_jobs': None,
+            'interim_jobs': None,
+            'total_jobs': None,
+            'sectors': {},
+            'locations': {},
+            'error': str(error)
+        }
 
     def scrape_snapshot(self, timestamp):
         """
         Scrape a specific snapshot and extract all job data
         """
-        wayback_url = f"{self.base_url}{timestamp}/{self.target_url}"
+        result = self.reuse_archived_result(timestamp)
+        if result is not None:
+            return result
 
         try:
-            print(f"Scraping snapshot: {timestamp}")
-            response = self.session.get(wayback_url, timeout=30)
-            response.raise_for_status()
+            logger.debug(f"Scraping snapshot: {timestamp}")
+            html = self.fetch_snapshot(timestamp)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            result = self.parse_snapshot(html, timestamp)
+            self.remember_result(result)
+            return result
 
-            # Extract job type counts
-            permanent_count, interim_count = self.extract_job_type_counts(
-                soup, timestamp)
+        except requests.RequestException as e:
+            return self.error_result(timestamp, e)
 
-            # Extract sector counts
-            sector_counts = self.extract_sector_counts(soup, timestamp)
+    def fetch_snapshot(self, timestamp):
+        """
+        Return the raw HTML of a snapshot, reading the cache before going to the network
+        """
+        if self.cache is not None:
+            html = self.cache.get(timestamp)
+            if html is not None:
+                self.metrics.count(timestamp, 'cache_hits')
+                self.cache_digest(timestamp)
+                return html
+            self.metrics.count(timestamp, 'cache_misses')
 
-            # Extract location counts
-            location_counts = self.extract_location_counts(soup, timestamp)
+        response = self.get_with_retry(self.snapshot_url(timestamp), timestamp=timestamp)
+        self.metrics.observe(timestamp, 'bytes', len(response.content))
 
-            # Convert timestamp to readable date
-            try:
-                date_obj = datetime.strptime(timestamp, '%Y%m%d%H%M%S')
-                readable_date = date_obj.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                readable_date = timestamp
-
-            result = {
-                'timestamp': timestamp,
-                'date': readable_date,
-                'wayback_url': wayback_url,
-                'permanent_jobs': permanent_count,
-                'interim_jobs': interim_count,
-                'total_jobs': (permanent_count or 0) + (interim_count or 0) if permanent_count is not None and interim_count is not None else None,
-                'sectors': sector_counts,
-                'locations': location_counts
-            }
+        if self.cache is not None:
+            self.cache.put(timestamp, response.text)
+            self.cache_digest(timestamp)
 
-            print(
-                f"  Job types - Permanent: {permanent_count}, Interim: {interim_count}")
-            print(f"  Sectors found: {len(sector_counts)}")
-            print(f"  Locations found: {len(location_counts)}")
+        return response.text
 
-            return result
+    def get_with_retry(self, url, timestamp=None, **kwargs):
+        """
+        GET a URL, retrying timeouts, 429 and 5xx responses with jittered exponential backoff
 
-        except requests.RequestException as e:
-            print(f"  Error scraping {timestamp}: {e}")
-            return {
-                'timestamp': timestamp,
-                'date': None,
-                'wayback_url': wayback_url,
-                'permanent_jobs': None,
-                'interim_jobs': None,
-                'total_jobs': None,
-                'sectors': {},
-                'locations': {},
-                'error': str(e)
-            }
-
-    def run_scraper(self, delay=2):
+        Every attempt waits for the rate limiter and the circuit breaker. Throttled responses
+        slow the limiter down, honouring Retry-After; healthy ones let it speed back up.
+        Waits, latencies and retries are recorded in the metrics against timestamp.
+        """
+        policy = self.retry_policy
+
+        for attempt in range(policy.max_retries + 1):
+            self.circuit_breaker.before_request()
+            if self.rate_limiter is not None:
+                start = time.perf_counter()
+                self.rate_limiter.wait()
+                self.metrics.observe(
+                    timestamp, 'rate_limit_wait_seconds', time.perf_counter() - start)
+
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=30, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                self.metrics.observe(timestamp, 'fetch_seconds', time.perf_counter() - start)
+
+                if response.status_code not in policy.retry_statuses:
+                    # The archive answered; anything other than success (e.g. 404) is final
+                    self.circuit_breaker.record_success()
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.record_success()
+                    response.raise_for_status()
+                    return response
+
+                retry_after = policy.retry_after(response)
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError as e:
+                    error = e
+                else:
+                    # A retry status below 400, which requests would not raise for
+                    error = requests.HTTPError(
+                        f"{response.status_code} {response.reason} for url: {url}", response=response)
+                # Hand a streamed response's connection back to the pool before backing off
+                response.close()
+
+            self.circuit_breaker.record_failure()
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_throttle(retry_after)
+
+            if attempt == policy.max_retries:
+                raise error
+
+            self.metrics.count(timestamp, 'retries')
+            wait = policy.backoff(attempt, retry_after)
+            logger.info(f"  Retrying in {wait:.1f}s after: {error}")
+            time.sleep(wait)
+
+    def reparse_cache(self, parse_workers=None):
+        """
+        Re-extract every cached snapshot in the date range without touching the archive
+
+        Captures that were never fetched, because the CDX index gave them the digest of a
+        cached page, are rebuilt from that page's result, so the output has a row for every
+        snapshot the scrape produced. With parse_workers set, the pages are read and parsed
+        in a process pool
+        """
+        cached = self.cache.timestamps()
+        digests = self.cache.digests()
+
+        # The first cached page of each digest stands in for every capture sharing it
+        sources = {}
+        for timestamp in cached:
+            if timestamp in digests:
+                sources.setdefault(digests[timestamp], timestamp)
+        cached_set = set(cached)
+        aliases = {timestamp: sources[digest] for timestamp, digest in digests.items()
+                   if timestamp not in cached_set and digest in sources}
+
+        timestamps = self.filter_date_strings(sorted(cached_set | set(aliases)))
+        to_parse = sorted({aliases.get(timestamp, timestamp) for timestamp in timestamps})
+        shared = set(aliases.values())
+        logger.info(f"Re-parsing {len(to_parse)} cached snapshots for {len(timestamps)} captures")
+        progress = ProgressLine(len(timestamps), label='Re-parsing')
+
+        try:
+            with (self.create_parse_pool(parse_workers) if parse_workers else nullcontext()) as pool:
+                if pool is not None:
+                    futures = {timestamp: pool.submit(parse_cached_in_worker, timestamp)
+                               for timestamp in to_parse}
+
+                # Results of cached pages that other captures share, by timestamp
+                shared_results = {}
+
+                for timestamp in timestamps:
+                    source = aliases.get(timestamp, timestamp)
+                    result = shared_results.get(source)
+
+                    if result is None:
+                        if pool is not None:
+                            result, snapshot_metrics = futures.pop(source).result()
+                            self.metrics.merge(source, snapshot_metrics)
+                        else:
+                            result = self.parse_snapshot(self.cache.get(source), source)
+                        if source in shared:
+                            shared_results[source] = result
+
+                    if source != timestamp:
+                        self.metrics.count(timestamp, 'digest_reuses')
+                        result = self.record_result(self.snapshot_record(result), timestamp)
+
+                    progress.update()
+                    yield result
+        finally:
+            progress.close()
+
+    def compare_parser_backends(self, timestamps=None):
+        """
+        Check that every installed parser backend, parsing only the sliced sidebar, extracts the
+        same facets from cached snapshots as html.parser does on the full page
+        """
+        timestamps = timestamps or self.cache.timestamps()
+        backends = [parser for parser in self.PARSER_BACKENDS if self.parser_available(parser)]
+        mismatches = []
+
+        for timestamp in timestamps:
+            html = self.cache.get(timestamp)
+            layout = self.detect_layout(html)
+            expected = self.extract_facets(
+                self.parse_html(html, 'html.parser'), timestamp, layout)
+
+            sidebar = self.slice_sidebar(html, layout)
+            for parser in backends:
+                facets = self.extract_facets(
+                    self.parse_html(sidebar, parser), timestamp, layout)
+                if facets != expected:
+                    mismatches.append((timestamp, parser))
+                    logger.warning(f"  {parser} differs from html.parser on {timestamp}")
+
+        logger.info(f"Compared {backends} on {len(timestamps)} snapshots: {len(mismatches)} mismatches")
+        return mismatches
+
+    def run_scraper(self, delay=2, workers=1, requests_per_second=None, incremental=False,
+                    base_filename=None, parse_workers=None, checkpoint=None,
+                    max_requests_per_second=None, sample=None):
         """
         Run the complete scraping process
+
+        With workers > 1 snapshots are fetched concurrently. A shared adaptive limiter starts
+        at requests_per_second (defaults to one per `delay`), backs off when the archive
+        throttles, and speeds up while it is healthy, never above max_requests_per_second
+        (defaults to requests_per_second).
+        With parse_workers set, parsing moves from the fetch threads to a process pool.
+        With incremental set to an output format ('csv', 'parquet' or 'sqlite'), only
+        timestamps missing from that saved output are scraped; True means 'csv', the
+        save_results default. Pass the format the results will be saved in; save_results
+        then merges them into that output rather than overwriting it.
+        With sample set to a SamplingPolicy (or 'day', 'week', 'month', 'year' for the first
+        snapshot of each period) only the snapshots it selects are scraped; it defaults to the
+        scraper's sampling. An AdaptiveSampling policy is run in rounds, each round adding
+        snapshots where the total job count moved fastest in the previous ones.
+        With a CheckpointJournal, every completed snapshot is logged and a restarted run
+        replays the logged results instead of scraping them again. A journal without a path
+        is kept at <base_filename>_progress.jsonl.
+
+        Results are yielded in timestamp order within each round as each snapshot completes.
+        """
+        # Set now rather than when the results are first pulled, because save_results
+        # opens its writer before iterating them
+        self.incremental_format = ('csv' if incremental is True else incremental) or None
+
+        return self.scrape_rounds(delay, workers, requests_per_second, base_filename,
+                                  parse_workers, checkpoint, max_requests_per_second, sample)
+
+    def scrape_rounds(self, delay, workers, requests_per_second, base_filename, parse_workers,
+                      checkpoint, max_requests_per_second, sample):
+        """
+        The generator behind run_scraper
         """
-        print("Starting Wayback Machine job scraper...")
+        logger.info("Starting Wayback Machine job scraper...")
 
         # Step 1: Find available snapshots
         timestamps = self.find_available_snapshots()
 
-        timestamps = self.filter_date_strings(timestamps)
+        index = TimestampIndex.from_sorted(self.filter_date_strings(timestamps))
+        policy = sampling_policy(sample if sample is not None else self.sampling)
+
+        existing = set()
+        if self.incremental_format is not None:
+            existing = self.load_existing_timestamps(base_filename, self.incremental_format)
+        timestamps = [timestamp for timestamp in policy.select(index) if timestamp not in existing]
 
         if not timestamps:
-            print("No snapshots found. Exiting.")
-            return []
+            logger.info("No snapshots found. Exiting.")
+            return
 
-        print(f"Found {len(timestamps)} snapshots to process")
+        logger.info(f"Found {len(timestamps)} snapshots to process")
 
-        # Step 2: Scrape each snapshot
-        results = []
+        completed = {}
+        if checkpoint is not None:
+            completed = checkpoint.for_output(base_filename or self.base_filename).load()
+        # Total jobs of every snapshot tried so far, which adaptive policies refine between
+        totals = {}
+        progress = ProgressLine(len(timestamps))
 
-        for i, timestamp in enumerate(timestamps):
-            result = self.scrape_snapshot(timestamp)
-            results.append(result)
+        try:
+            while timestamps:
+                pending = [timestamp for timestamp in timestamps if timestamp not in completed]
+                if len(pending) < len(timestamps):
+                    logger.info(f"Resuming: {len(timestamps) - len(pending)} snapshots already completed")
+
+                # Step 2: Scrape each remaining snapshot
+                scraped = self.scrape_timestamps(
+                    pending, delay, workers, requests_per_second, parse_workers, max_requests_per_second)
+
+                for timestamp in timestamps:
+                    if timestamp in completed:
+                        result = completed.pop(timestamp)
+                    else:
+                        result = next(scraped)
+
+                        # Only log a result once it has been handed on, so the journal matches the outputs
+                        if checkpoint is not None and 'error' not in result:
+                            checkpoint.record(result)
+
+                    totals[timestamp] = result.get('total_jobs')
+                    progress.update()
+                    yield result
+
+                timestamps = [
+                    timestamp for timestamp in policy.refine(index, totals) if timestamp not in existing]
+                if timestamps:
+                    logger.info(f"Refining: {len(timestamps)} more snapshots where counts changed fastest")
+                    progress.add_total(len(timestamps))
+        finally:
+            progress.close()
+
+        if checkpoint is not None:
+            checkpoint.clear()
+
+    def scrape_timestamps(self, timestamps, delay=2, workers=1, requests_per_second=None,
+                          parse_workers=None, max_requests_per_second=None):
+        """
+        Scrape the given timestamps, yielding results in timestamp order
+        """
+        # Space requests to be respectful; cached pages make no request and skip the limiter
+        self.rate_limiter = AdaptiveRateLimiter(
+            requests_per_second or (1 / delay if delay else None), max_requests_per_second)
 
-            # Add delay between requests to be respectful
-            if i < len(timestamps) - 1:
-                time.sleep(delay)
+        if workers > 1 or parse_workers:
+            yield from self.scrape_concurrently(timestamps, workers, parse_workers)
+            return
 
-        return results
+        for timestamp in timestamps:
+            yield self.scrape_snapshot(timestamp)
+
+    def scrape_concurrently(self, timestamps, workers, parse_workers=None):
+        """
+        Scrape snapshots on a bounded worker pool, yielding results in timestamp order
+
+        With parse_workers set, the fetch threads only download pages and hand the raw HTML
+        to a process pool, which returns the small result dicts
+        """
+        # Let every worker keep its own pooled connection to the archive
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('https://', adapter)
+
+        if not parse_workers:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map() yields in submission order, so results stay sorted by timestamp
+                yield from executor.map(self.scrape_snapshot, timestamps)
+                return
+
+        with self.create_parse_pool(parse_workers) as parse_pool, \
+                ThreadPoolExecutor(max_workers=workers) as fetch_pool:
+
+            def fetch_and_submit(timestamp):
+                reused = self.reuse_archived_result(timestamp)
+                if reused is not None:
+                    # Stand in for the parse future, as there is nothing to parse
+                    done = Future()
+                    done.set_result((reused, {}))
+                    return done
+
+                logger.debug(f"Scraping snapshot: {timestamp}")
+                html = self.fetch_snapshot(timestamp)
+                parsed = parse_pool.submit(parse_in_worker, html, timestamp)
+                # Remember each result as soon as it is parsed, for the fetches still queued
+                parsed.add_done_callback(
+                    lambda done: done.exception() or self.remember_result(done.result()[0]))
+                return parsed
+
+            fetches = [fetch_pool.submit(fetch_and_submit, timestamp)
+                       for timestamp in timestamps]
+
+            for timestamp in timestamps:
+                # Release each page as soon as its result has been handed on
+                fetched = fetches.pop(0)
+                try:
+                    parsed = fetched.result()
+                except requests.RequestException as e:
+                    yield self.error_result(timestamp, e)
+                    continue
+
+                # The worker timed the parse; fold its record into this scraper's metrics
+                result, snapshot_metrics = parsed.result()
+                self.metrics.merge(timestamp, snapshot_metrics)
+                yield result
+
+    def parse_config(self):
+        """
+        Settings a parse worker process needs to rebuild this scraper's parsing behaviour
+        """
+        return {
+            'cls': type(self),
+            'parser': self.parser,
+            'layout': self.layout,
+            'base_url': self.base_url,
+            'target_url': self.target_url,
+            'cache_directory': self.cache.directory if self.cache is not None else None,
+            'canonicaliser': self.canonicaliser,
+        }
+
+    def create_parse_pool(self, parse_workers):
+        return ProcessPoolExecutor(
+            max_workers=parse_workers, initializer=init_parse_worker,
+            initargs=(self.parse_config(),))
+
+    def load_existing_timestamps(self, base_filename=None, format='csv'):
+        """
+        Load the timestamps a previous run saved in the output save_results writes for
+        `format`: the summary CSV or Parquet file, or the SQLite store
+        """
+        base_filename = base_filename or self.base_filename
+        if format not in self.RESULT_WRITERS:
+            raise ValueError(f"Unknown output format {format!r}, expected one of {sorted(self.RESULT_WRITERS)}")
+
+        if format == 'sqlite':
+            filename = f"{base_filename}.sqlite"
+            if not os.path.exists(filename):
+                return set()
+            store = ResultStore(filename)
+            existing = store.timestamps()
+            store.close()
+        else:
+            filename = f"{base_filename}_summary.{format}"
+            summary = self.load_saved_dataframe(filename)
+            existing = set(summary['timestamp'].astype(str)) if not summary.empty else set()
+
+        # Failed snapshots are never saved, so they are retried
+        if existing:
+            logger.info(f"Found {len(existing)} snapshots already saved in {filename}")
+        return existing
 
     def create_summary_dataframe(self, results):
         """
         Create a summary DataFrame with basic job statistics
         """
+        if isinstance(results, SnapshotHistory):
+            return results.summary_dataframe()
+
         summary_data = []
 
         for result in results:
@@ -328,120 +1219,168 @@ class WaybackJobScraper:
 
         return pd.DataFrame(summary_data)
 
+    def create_facet_dataframe(self, results, result_key, name_column):
+        """
+        Create a long DataFrame of one facet's counts, one row per (snapshot, name)
+
+        The columns are built whole rather than row by row: each snapshot's timestamp and
+        date are repeated once per name, and the names become a categorical column.
+        A SnapshotHistory's count arrays are used as they are
+        """
+        if isinstance(results, SnapshotHistory):
+            return results.facet_dataframe(name_column)
+
+        valid = [result for result in results if 'error' not in result and result[result_key]]
+        if not valid:
+            return pd.DataFrame()
+
+        lengths = [len(result[result_key]) for result in valid]
+        rows = sum(lengths)
+
+        return pd.DataFrame({
+            'timestamp': np.repeat(np.array([result['timestamp'] for result in valid], dtype=object), lengths),
+            'date': np.repeat(np.array([result['date'] for result in valid], dtype=object), lengths),
+            name_column: pd.Categorical(list(chain.from_iterable(result[result_key] for result in valid))),
+            'job_count': np.fromiter(
+                chain.from_iterable(result[result_key].values() for result in valid),
+                dtype=np.int64, count=rows),
+        })
+
     def create_sector_dataframe(self, results):
         """
         Create a detailed DataFrame for sector data
         """
-        sector_data = []
-
-        for result in results:
-            if 'error' not in result and result['sectors']:
-                for sector, count in result['sectors'].items():
-                    sector_data.append({
-                        'timestamp': result['timestamp'],
-                        'date': result['date'],
-                        'sector': sector,
-                        'job_count': count
-                    })
-
-        return pd.DataFrame(sector_data)
+        return self.create_facet_dataframe(results, 'sectors', 'sector')
 
     def create_location_dataframe(self, results):
         """
         Create a detailed DataFrame for location data
         """
-        location_data = []
+        return self.create_facet_dataframe(results, 'locations', 'location')
 
-        for result in results:
-            if 'error' not in result and result['locations']:
-                for location, count in result['locations'].items():
-                    location_data.append({
-                        'timestamp': result['timestamp'],
-                        'date': result['date'],
-                        'location': location,
-                        'job_count': count
-                    })
-
-        return pd.DataFrame(location_data)
-
-    def save_results(self, results, base_filename='wayback_job_stats'):
+    def save_results(self, results, base_filename=None, merge=None, format='csv'):
         """
-        Save results to multiple CSV files
+        Save results to multiple CSV files, writing each result as it arrives
+
+        `results` may be a list or the generator returned by run_scraper.
+        With merge=True the results are merged into the existing files instead of overwriting
+        them. By default they are merged after an incremental run_scraper and overwrite otherwise.
+        With format='parquet' typed Parquet files are written instead, in batches, and with
+        format='sqlite' the results are upserted into the <base_filename>.sqlite store
         """
-        if not results:
-            print("No results to save")
-            return
+        base_filename = base_filename or self.base_filename
 
-        # Create summary DataFrame
-        summary_df = self.create_summary_dataframe(results)
-        if not summary_df.empty:
-            summary_filename = f"{base_filename}_summary.csv"
-            summary_df.to_csv(summary_filename, index=False)
-            print(f"Summary results saved to {summary_filename}")
+        if self.incremental_format is not None:
+            if merge is False:
+                logger.warning("Saving an incremental run with merge=False replaces the saved "
+                               "outputs with only the snapshots it scraped")
+            if self.incremental_format != format:
+                logger.warning(f"The incremental run skipped snapshots already saved as "
+                               f"{self.incremental_format}, but is being saved as {format}")
+        if merge is None:
+            merge = self.incremental_format is not None
 
-        # Create sector DataFrame
-        sector_df = self.create_sector_dataframe(results)
-        if not sector_df.empty:
-            sector_filename = f"{base_filename}_sectors.csv"
-            sector_df.to_csv(sector_filename, index=False)
-            print(f"Sector data saved to {sector_filename}")
+        writer = self.RESULT_WRITERS[format](self, base_filename, merge)
 
-        # Create location DataFrame
-        location_df = self.create_location_dataframe(results)
-        if not location_df.empty:
-            location_filename = f"{base_filename}_locations.csv"
-            location_df.to_csv(location_filename, index=False)
-            print(f"Location data saved to {location_filename}")
+        for result in results:
+            writer.write(result)
+
+        written = writer.close()
+        if not written:
+            logger.info("No results to save")
+            return
 
-        # Print summary statistics
+        for label, filename in written:
+            logger.info(f"{label} saved to {filename}")
+
+        # Print summary statistics from the files just written
+        summary_df, sector_df, location_df = writer.saved_dataframes()
         self.print_summary(summary_df, sector_df, location_df)
 
+    def load_saved_dataframe(self, filename):
+        return read_saved_output(filename)
+
     def print_summary(self, summary_df, sector_df, location_df):
         """
         Print summary statistics
         """
-        print(f"\n=== SCRAPING SUMMARY ===")
+        # Logged as one message so concurrent output cannot interleave with it
+        lines = [f"\n=== SCRAPING SUMMARY ==="]
 
         if not summary_df.empty:
             valid_results = summary_df[(summary_df['permanent_jobs'].notna()) & (
                 summary_df['interim_jobs'].notna())]
-            print(f"Total snapshots processed: {len(summary_df)}")
-            print(
+            lines.append(f"Total snapshots processed: {len(summary_df)}")
+            lines.append(
                 f"Successfully extracted job type data from: {len(valid_results)} snapshots")
 
             if len(valid_results) > 0:
-                print(
+                lines.append(
                     f"Date range: {valid_results['date'].min()} to {valid_results['date'].max()}")
-                print(
+                lines.append(
                     f"Permanent jobs range: {valid_results['permanent_jobs'].min()} to {valid_results['permanent_jobs'].max()}")
-                print(
+                lines.append(
                     f"Interim jobs range: {valid_results['interim_jobs'].min()} to {valid_results['interim_jobs'].max()}")
 
         if not sector_df.empty:
             unique_sectors = sector_df['sector'].nunique()
             total_sector_entries = len(sector_df)
-            print(
+            lines.append(
                 f"\nSector data: {total_sector_entries} entries across {unique_sectors} unique sectors")
 
             # Top sectors by average job count
             avg_by_sector = sector_df.groupby(
-                'sector')['job_count'].mean().sort_values(ascending=False)
-            print("Top 5 sectors by average job count:")
+                'sector', observed=True)['job_count'].mean().sort_values(ascending=False)
+            lines.append("Top 5 sectors by average job count:")
             for sector, avg_count in avg_by_sector.head().items():
-                print(f"  {sector}: {avg_count:.1f}")
+                lines.append(f"  {sector}: {avg_count:.1f}")
 
         if not location_df.empty:
             unique_locations = location_df['location'].nunique()
             total_location_entries = len(location_df)
-            print(
+            lines.append(
                 f"\nLocation data: {total_location_entries} entries across {unique_locations} unique locations")
 
             # Top locations by average job count
             avg_by_location = location_df.groupby(
-                'location')['job_count'].mean().sort_values(ascending=False)
-            print("Top 5 locations by average job count:")
+                'location', observed=True)['job_count'].mean().sort_values(ascending=False)
+            lines.append("Top 5 locations by average job count:")
             for location, avg_count in avg_by_location.head().items():
-                print(f"  {location}: {avg_count:.1f}")
+                lines.append(f"  {location}: {avg_count:.1f}")
+
+        logger.info('\n'.join(lines))
+
+
+# %%
+# Parse worker processes each hold one scraper, built once by the pool initializer
+parse_worker_scraper = None
+
+
+def init_parse_worker(config):
+    global parse_worker_scraper
+
+    cache = None
+    if config['cache_directory'] is not None:
+        cache = SnapshotCache(config['cache_directory'])
+
+    parse_worker_scraper = config['cls'](
+        cache=cache, parser=config['parser'])
+    parse_worker_scraper.layout = config['layout']
+    parse_worker_scraper.base_url = config['base_url']
+    parse_worker_scraper.target_url = config['target_url']
+    parse_worker_scraper.canonicaliser = config['canonicaliser']
+
+
+def parse_in_worker(html, timestamp):
+    result = parse_worker_scraper.parse_snapshot(html, timestamp)
+    return result, parse_worker_scraper.metrics.pop(timestamp)
+
+
+def parse_cached_in_worker(timestamp):
+    # Read the page inside the worker so only the timestamp and result cross processes
+    result = parse_worker_scraper.parse_snapshot(
+        parse_worker_scraper.cache.get(timestamp), timestamp)
+    return result, parse_worker_scraper.metrics.pop(timestamp)
 
 
 # %%
@@ -451,26 +1390,53 @@ if __name__ == "__main__":
     date_range.append(datetime.strptime("2015-12-06", "%Y-%m-%d"))
     date_range.append(datetime.strptime("2026-01-01", "%Y-%m-%d"))
 
-    scraper = WaybackJobScraper(date_range)
-
-    # Run the scraper
-    results = scraper.run_scraper(delay=1)  # 2 second delay between requests
-
-    # Save results to multiple CSV files
+    # The layout is detected per page, so starting in 2011 would also cover the legacy
+    # pages in the same pass and CDX query (aj_scrape_retro.py writes them separately)
+    # Keep raw pages on disk so later runs and parser changes never re-download them.
+    # parser='selectolax' or 'lxml' parses much faster when installed
+    scraper = WaybackJobScraper(
+        date_range, cache=SnapshotCache(), cdx_cache=CdxIndexCache())
+
+    # One progress line plus run-level messages; logging.DEBUG adds a line per snapshot
+    # and quiet=True keeps only warnings and errors
+    configure_logging()
+
+    # Run the scraper, logging progress so an interrupted backfill resumes where it stopped
+    results = scraper.run_scraper(
+        delay=1, checkpoint=CheckpointJournal())  # 2 second delay between requests
+    # For a weekly refresh only scrape snapshots newer than the saved CSVs
+    # results = scraper.run_scraper(delay=1, incremental='csv')
+    # scraper.save_results(results)  # merged into the saved CSVs
+    # (or incremental='sqlite' with save_results(results, format='sqlite'))
+    # For a faster backfill fetch several snapshots at once, capped at 1 request/second
+    # results = scraper.run_scraper(workers=4, requests_per_second=1)
+    # For a long history, a monthly grid densified only where the job count moves sharply
+    # results = scraper.run_scraper(sample=AdaptiveSampling(base_days=28, min_days=7))
+    # After a parser change, re-extract the whole cache on every core
+    # results = scraper.reparse_cache(parse_workers=os.cpu_count())
+    # To keep a long history in memory for analysis, pack it into a SnapshotHistory
+    # results = SnapshotHistory(scraper, scraper.run_scraper())
+
+    # Save results to multiple CSV files, one snapshot at a time as they are scraped
     scraper.save_results(results)
+    # Or typed Parquet files (int64 timestamp, datetime, categorical names) with pyarrow installed
+    # scraper.save_results(results, format='parquet')
+    # Or an indexed SQLite store that re-runs upsert into, e.g. for one location's time series
+    # scraper.save_results(results, format='sqlite')
+
+    # Where the time went: network, rate limiter or parser
+    scraper.metrics.print_report()
+    scraper.metrics.to_json(f"{scraper.base_filename}_metrics.json")
 
     # Print sample results
-    if results:
+    summary_df = scraper.load_saved_dataframe(f"{scraper.base_filename}_summary.csv")
+    if not summary_df.empty:
         print(f"\n=== SAMPLE RESULTS ===")
-        for i, result in enumerate(results[:3]):
-            if 'error' not in result:
-                print(f"\nSnapshot {result['timestamp']}:")
-                print(
-                    f"  Job types - Permanent: {result['permanent_jobs']}, Interim: {result['interim_jobs']}")
-                # Show first 5 sectors
-                print(f"  Sectors: {list(result['sectors'].keys())[:5]}...")
-                # Show first 5 locations
-                print(
-                    f"  Locations: {list(result['locations'].keys())[:5]}...")
+        for _, row in summary_df.head(3).iterrows():
+            print(f"\nSnapshot {row['timestamp']}:")
+            print(
+                f"  Job types - Permanent: {row['permanent_jobs']}, Interim: {row['interim_jobs']}")
+            print(
+                f"  Sectors: {row['sectors_count']}, Locations: {row['locations_count']}")
 
 # %%
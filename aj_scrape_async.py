@@ -0,0 +1,178 @@
+# %%
+import asyncio
+import aiohttp
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from aj_progress import ProgressLine, configure_logging, logger
+from aj_rate_limit import AsyncTokenBucket
+from aj_scrape_3 import WaybackJobScraper
+
+
+# %%
+class AsyncWaybackEngine:
+    """
+    Runs the snapshot fetches of a scraper on an asyncio event loop.
+
+    The scraper (WaybackJobScraper or LegacyWaybackJobScraper) supplies the URLs,
+    CDX lookup and `parse_snapshot`, so results are the same dicts that
+    `scrape_snapshot` returns and can be passed straight to `save_results`.
+    """
+
+    def __init__(self, scraper, concurrency=4, requests_per_second=1.0, burst=1, parse_workers=None,
+                 checkpoint=None):
+        self.scraper = scraper
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.parse_workers = parse_workers
+        # Optional CheckpointJournal shared with the blocking path
+        self.checkpoint = checkpoint
+
+    def create_session(self):
+        # One keep-alive pool for the whole run, sized to the number of concurrent fetches
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency, keepalive_timeout=30)
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=dict(self.scraper.session.headers),
+            timeout=aiohttp.ClientTimeout(total=30),
+            raise_for_status=True)
+
+    async def find_available_snapshots(self):
+        """
+        Find all available snapshots with the scraper's own CDX lookup, run in a thread
+
+        It pages through the index with resumeKey and answers repeat lookups from the
+        scraper's CdxIndexCache, and is a handful of requests, so it gains nothing from the loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.scraper.find_available_snapshots)
+
+    async def scrape_snapshot(self, session, limiter, executor, timestamp, progress=None):
+        """
+        Fetch a snapshot on the event loop and parse it in the executor
+        """
+        result = await self.fetch_and_parse(session, limiter, executor, timestamp)
+        if progress is not None:
+            progress.update()
+
+        if self.checkpoint is not None and 'error' not in result:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, self.checkpoint.record, result)
+
+        return result
+
+    async def fetch_and_parse(self, session, limiter, executor, timestamp):
+        wayback_url = self.scraper.snapshot_url(timestamp)
+
+        cache = self.scraper.cache
+        metrics = self.scraper.metrics
+        loop = asyncio.get_running_loop()
+
+        html = None
+        if cache is not None:
+            html = await loop.run_in_executor(executor, cache.get, timestamp)
+            metrics.count(timestamp, 'cache_hits' if html is not None else 'cache_misses')
+
+        if html is None:
+            try:
+                start = time.perf_counter()
+                await limiter.acquire()
+                metrics.observe(timestamp, 'rate_limit_wait_seconds', time.perf_counter() - start)
+
+                # The limiter spaces the fetches out, so an identical earlier capture
+                # may have been parsed while this one waited
+                result = self.scraper.reuse_archived_result(timestamp)
+                if result is not None:
+                    return result
+
+                logger.debug(f"Scraping snapshot: {timestamp}")
+                start = time.perf_counter()
+                async with session.get(wayback_url) as response:
+                    body = await response.read()
+                    # Undecodable bytes are replaced, as requests' response.text does
+                    html = body.decode(response.get_encoding(), errors='replace')
+                metrics.observe(timestamp, 'fetch_seconds', time.perf_counter() - start)
+                metrics.observe(timestamp, 'bytes', len(body))
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return self.scraper.error_result(timestamp, e)
+
+            if cache is not None:
+                await loop.run_in_executor(executor, cache.put, timestamp, html)
+
+        if cache is not None:
+            await loop.run_in_executor(executor, self.scraper.cache_digest, timestamp)
+
+        result = await loop.run_in_executor(
+            executor, self.scraper.parse_snapshot, html, timestamp)
+        self.scraper.remember_result(result)
+
+        return result
+
+    async def run(self):
+        """
+        Run the complete scraping process, returning results in timestamp order
+        """
+        logger.info("Starting async Wayback Machine job scraper...")
+
+        limiter = AsyncTokenBucket(self.requests_per_second, self.burst)
+
+        async with self.create_session() as session:
+            # Step 1: Find available snapshots
+            timestamps = await self.find_available_snapshots()
+            timestamps = self.scraper.filter_date_strings(timestamps)
+
+            if not timestamps:
+                logger.info("No snapshots found. Exiting.")
+                return []
+
+            logger.info(f"Found {len(timestamps)} snapshots to process")
+
+            completed = {}
+            if self.checkpoint is not None:
+                completed = self.checkpoint.for_output(self.scraper.base_filename).load()
+            pending = [timestamp for timestamp in timestamps if timestamp not in completed]
+            if len(pending) < len(timestamps):
+                logger.info(f"Resuming: {len(timestamps) - len(pending)} snapshots already completed")
+
+            # Step 2: Scrape each remaining snapshot, parsing off the event loop
+            progress = ProgressLine(len(pending))
+            try:
+                with ThreadPoolExecutor(max_workers=self.parse_workers) as executor:
+                    scraped = await asyncio.gather(*[
+                        self.scrape_snapshot(session, limiter, executor, timestamp, progress)
+                        for timestamp in pending])
+            finally:
+                progress.close()
+
+        completed.update((result['timestamp'], result) for result in scraped)
+
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+
+        return [completed[timestamp] for timestamp in timestamps]
+
+    def run_scraper(self):
+        return asyncio.run(self.run())
+
+
+# %%
+if __name__ == "__main__":
+    date_range = []
+    date_range.append(datetime.strptime("2015-12-06", "%Y-%m-%d"))
+    date_range.append(datetime.strptime("2026-01-01", "%Y-%m-%d"))
+
+    configure_logging()
+
+    scraper = WaybackJobScraper(date_range)
+    engine = AsyncWaybackEngine(scraper, concurrency=4, requests_per_second=1)
+
+    results = engine.run_scraper()
+
+    # Results match scrape_snapshot, so the usual CSV writers apply
+    scraper.save_results(results)
+
+# %%
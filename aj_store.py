@@ -0,0 +1,168 @@
+# %%
+import json
+import sqlite3
+
+import pandas as pd
+
+
+# %%
+class ResultStore:
+    """
+    SQLite store of scraped results, normalised into snapshots, facet values and counts.
+
+    Counts are keyed by (facet_id, timestamp) and facet values by (facet, name), so one facet
+    value's time series, such as London's, is an index range scan rather than a full read.
+    Writes are UPSERTs, so saving the same snapshots again leaves the store unchanged.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            timestamp TEXT PRIMARY KEY,
+            date TEXT,
+            wayback_url TEXT,
+            permanent_jobs INTEGER,
+            interim_jobs INTEGER,
+            total_jobs INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS facets (
+            id INTEGER PRIMARY KEY,
+            facet TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (facet, name)
+        );
+        CREATE TABLE IF NOT EXISTS counts (
+            facet_id INTEGER NOT NULL REFERENCES facets (id),
+            timestamp TEXT NOT NULL REFERENCES snapshots (timestamp),
+            job_count INTEGER NOT NULL,
+            -- Order of the value in the snapshot's sidebar
+            position INTEGER NOT NULL,
+            PRIMARY KEY (facet_id, timestamp)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS counts_timestamp ON counts (timestamp);
+    """
+
+    def __init__(self, path='wayback_job_stats.sqlite', result_keys=None):
+        self.path = path
+        # Facet name -> key of its counts in a result dict
+        self.result_keys = result_keys or {'sector': 'sectors', 'location': 'locations'}
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript(self.SCHEMA)
+        self.facet_ids = {}
+
+    def facet_id(self, facet, name):
+        """
+        Id of a facet value, adding it on first sight
+        """
+        key = (facet, name)
+        if key not in self.facet_ids:
+            self.connection.execute(
+                'INSERT INTO facets (facet, name) VALUES (?, ?) ON CONFLICT (facet, name) DO NOTHING',
+                key)
+            self.facet_ids[key] = self.connection.execute(
+                'SELECT id FROM facets WHERE facet = ? AND name = ?', key).fetchone()[0]
+        return self.facet_ids[key]
+
+    def upsert(self, results):
+        """
+        Insert or update a batch of results in a single transaction; failed snapshots are skipped
+        """
+        snapshot_rows = []
+        count_rows = []
+        current_ids = []
+
+        try:
+            with self.connection:
+                for result in results:
+                    if 'error' in result:
+                        continue
+
+                    snapshot_rows.append((
+                        result['timestamp'], result['date'], result['wayback_url'],
+                        result['permanent_jobs'], result['interim_jobs'], result['total_jobs']))
+
+                    facet_ids = []
+                    for facet, result_key in self.result_keys.items():
+                        for position, (name, count) in enumerate(result.get(result_key, {}).items()):
+                            facet_id = self.facet_id(facet, name)
+                            facet_ids.append(facet_id)
+                            count_rows.append((facet_id, result['timestamp'], count, position))
+                    current_ids.append((result['timestamp'], json.dumps(facet_ids)))
+
+                self.connection.executemany("""
+                    INSERT INTO snapshots (timestamp, date, wayback_url, permanent_jobs, interim_jobs, total_jobs)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (timestamp) DO UPDATE SET
+                        date = excluded.date,
+                        wayback_url = excluded.wayback_url,
+                        permanent_jobs = excluded.permanent_jobs,
+                        interim_jobs = excluded.interim_jobs,
+                        total_jobs = excluded.total_jobs
+                """, snapshot_rows)
+
+                self.connection.executemany("""
+                    INSERT INTO counts (facet_id, timestamp, job_count, position) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (facet_id, timestamp) DO UPDATE SET
+                        job_count = excluded.job_count,
+                        position = excluded.position
+                """, count_rows)
+
+                # A re-scraped snapshot may list fewer values than before; drop the ones it lost
+                self.connection.executemany("""
+                    DELETE FROM counts
+                    WHERE timestamp = ? AND facet_id NOT IN (SELECT value FROM json_each(?))
+                """, current_ids)
+        except Exception:
+            # Ids added inside the rolled-back transaction no longer exist in the store
+            self.facet_ids.clear()
+            raise
+
+        return len(snapshot_rows)
+
+    def timestamps(self):
+        return {row[0] for row in self.connection.execute('SELECT timestamp FROM snapshots')}
+
+    def summary_dataframe(self):
+        """
+        The summary table in the same columns as the summary CSV
+        """
+        return pd.read_sql_query("""
+            SELECT s.timestamp, s.date, s.permanent_jobs, s.interim_jobs, s.total_jobs,
+                   (SELECT COUNT(*) FROM counts c JOIN facets f ON f.id = c.facet_id
+                    WHERE c.timestamp = s.timestamp AND f.facet = 'sector') AS sectors_count,
+                   (SELECT COUNT(*) FROM counts c JOIN facets f ON f.id = c.facet_id
+                    WHERE c.timestamp = s.timestamp AND f.facet = 'location') AS locations_count,
+                   s.wayback_url
+            FROM snapshots s
+            ORDER BY s.timestamp
+        """, self.connection)
+
+    def facet_dataframe(self, facet):
+        """
+        Every count of one facet, in the same columns as its CSV (timestamp, date, <facet>, job_count)
+        """
+        return pd.read_sql_query(f"""
+            SELECT c.timestamp, s.date, f.name AS {facet}, c.job_count
+            FROM counts c
+            JOIN facets f ON f.id = c.facet_id
+            JOIN snapshots s ON s.timestamp = c.timestamp
+            WHERE f.facet = ?
+            ORDER BY c.timestamp, c.position
+        """, self.connection, params=(facet,))
+
+    def facet_series(self, facet, name, start=None, end=None):
+        """
+        Time series of one facet value, e.g. facet_series('location', 'London (Greater)')
+        """
+        return pd.read_sql_query("""
+            SELECT c.timestamp, s.date, c.job_count
+            FROM facets f
+            JOIN counts c ON c.facet_id = f.id
+            JOIN snapshots s ON s.timestamp = c.timestamp
+            WHERE f.facet = ? AND f.name = ? AND c.timestamp BETWEEN ? AND ?
+            ORDER BY c.timestamp
+        """, self.connection, params=(facet, name, start or '0', end or '9'))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,218 @@
+# %%
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+
+# %%
+class TimestampIndex:
+    """
+    Sorted Wayback timestamps (14-digit YYYYMMDDhhmmss strings) with O(log n) range queries.
+
+    The strings sort in time order, so bounds are compared as strings and nothing is parsed.
+    """
+
+    # Timestamp prefix identifying each calendar period; weeks are handled separately
+    PERIOD_PREFIXES = {'day': 8, 'month': 6, 'year': 4}
+
+    def __init__(self, timestamps):
+        self.timestamps = sorted(timestamps)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        return iter(self.timestamps)
+
+    def __getitem__(self, i):
+        return self.timestamps[i]
+
+    def bound(self, value, upper=False):
+        """
+        Turn a datetime or a (possibly partial) timestamp string such as '2016' or '201603'
+        into a 14-digit bound; a partial upper bound covers the whole period it names
+        """
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            return value.strftime('%Y%m%d%H%M%S')
+        return value.ljust(14, '9' if upper else '0')
+
+    def range(self, start=None, end=None):
+        """
+        Timestamps between start and end inclusive; either bound may be None for an open range
+        """
+        start = self.bound(start)
+        end = self.bound(end, upper=True)
+
+        lo = bisect_left(self.timestamps, start) if start is not None else 0
+        hi = bisect_right(self.timestamps, end) if end is not None else len(self.timestamps)
+
+        return TimestampIndex.from_sorted(self.timestamps[lo:hi])
+
+    def period_key(self, timestamp, period):
+        if period == 'week':
+            return date(int(timestamp[:4]), int(timestamp[4:6]), int(timestamp[6:8])).isocalendar()[:2]
+        return timestamp[:self.PERIOD_PREFIXES[period]]
+
+    def sample(self, period):
+        """
+        Thin the index to the first timestamp of each 'day', 'week', 'month' or 'year'
+        """
+        if period != 'week' and period not in self.PERIOD_PREFIXES:
+            raise ValueError(
+                f"Unknown period {period!r}, expected 'week' or one of {list(self.PERIOD_PREFIXES)}")
+
+        sampled = []
+        last_key = None
+        for timestamp in self.timestamps:
+            key = self.period_key(timestamp, period)
+            if key != last_key:
+                sampled.append(timestamp)
+                last_key = key
+
+        return TimestampIndex.from_sorted(sampled)
+
+    @classmethod
+    def from_sorted(cls, timestamps):
+        """
+        Wrap timestamps that are already sorted without sorting them again
+        """
+        index = cls.__new__(cls)
+        index.timestamps = timestamps
+        return index
+
+
+def day_number(timestamp):
+    """
+    Proleptic ordinal of a timestamp's calendar day, for day arithmetic without strptime
+    """
+    return date(int(timestamp[:4]), int(timestamp[4:6]), int(timestamp[6:8])).toordinal()
+
+
+# %%
+class SamplingPolicy:
+    """
+    Chooses which snapshots of a TimestampIndex are worth fetching.
+
+    select() picks the first round. Adaptive policies may then ask for more timestamps from
+    refine(), given the total job counts scraped so far (None where a snapshot failed).
+    """
+
+    def select(self, index):
+        return list(index)
+
+    def refine(self, index, totals):
+        return []
+
+
+class CalendarSampling(SamplingPolicy):
+    """
+    The first snapshot of each 'day', 'week', 'month' or 'year'
+    """
+
+    def __init__(self, period='month'):
+        self.period = period
+
+    def select(self, index):
+        return list(index.sample(self.period))
+
+
+class EveryNDays(SamplingPolicy):
+    """
+    One snapshot, then the next one at least `days` days later, and so on
+    """
+
+    def __init__(self, days=7):
+        self.days = days
+
+    def select(self, index):
+        selected = []
+        next_day = None
+
+        for timestamp in index:
+            day = day_number(timestamp)
+            if next_day is None or day >= next_day:
+                selected.append(timestamp)
+                next_day = day + self.days
+
+        return selected
+
+
+class MaxPerMonth(SamplingPolicy):
+    """
+    At most `per_month` snapshots per calendar month, spread evenly over the month's captures
+    """
+
+    def __init__(self, per_month=2):
+        self.per_month = per_month
+
+    def select(self, index):
+        months = {}
+        for timestamp in index:
+            months.setdefault(timestamp[:6], []).append(timestamp)
+
+        selected = []
+        for captures in months.values():
+            if len(captures) <= self.per_month:
+                selected.extend(captures)
+            elif self.per_month == 1:
+                selected.append(captures[0])
+            else:
+                step = (len(captures) - 1) / (self.per_month - 1)
+                selected.extend(captures[round(i * step)] for i in range(self.per_month))
+
+        return selected
+
+
+class AdaptiveSampling(SamplingPolicy):
+    """
+    A coarse grid of one snapshot every `base_days`, refined wherever the total job count
+    moves by more than `threshold` (relative) between neighbouring samples.
+
+    Each refinement adds the capture nearest the middle of such a gap, until gaps are
+    shorter than 2 * min_days, so quiet stretches stay sparse and fast-moving ones get dense.
+    """
+
+    def __init__(self, base_days=28, min_days=7, threshold=0.1):
+        self.base_days = base_days
+        self.min_days = min_days
+        self.threshold = threshold
+
+    def select(self, index):
+        return EveryNDays(self.base_days).select(index)
+
+    def refine(self, index, totals):
+        known = sorted(
+            (timestamp, total) for timestamp, total in totals.items() if total is not None)
+        added = []
+
+        for (start, start_total), (end, end_total) in zip(known, known[1:]):
+            start_day, end_day = day_number(start), day_number(end)
+            if end_day - start_day < 2 * self.min_days:
+                continue
+            if abs(end_total - start_total) <= self.threshold * max(start_total, 1):
+                continue
+
+            middle = date.fromordinal((start_day + end_day) // 2).strftime('%Y%m%d')
+            position = bisect_left(index.timestamps, middle + '000000')
+
+            # Nearest capture to the middle that lies strictly inside the gap and is untried
+            candidates = [
+                timestamp for timestamp in index.timestamps[max(position - 1, 0):position + 1]
+                if start < timestamp < end and timestamp not in totals]
+            if candidates:
+                added.append(min(
+                    candidates, key=lambda timestamp: abs(day_number(timestamp) - day_number(middle))))
+
+        return sorted(set(added))
+
+
+def sampling_policy(sample):
+    """
+    Accept a SamplingPolicy, a calendar period name, or None for every snapshot
+    """
+    if sample is None:
+        return SamplingPolicy()
+    if isinstance(sample, str):
+        return CalendarSampling(sample)
+    return sample
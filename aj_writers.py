@@ -0,0 +1,288 @@
+# %%
+import os
+import pandas as pd
+
+from aj_store import ResultStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# %%
+def read_saved_output(filename):
+    """
+    Read a CSV or Parquet output back, or an empty DataFrame if it has not been written
+    """
+    try:
+        if filename.endswith('.parquet'):
+            return pd.read_parquet(filename)
+        return pd.read_csv(filename, dtype={'timestamp': str})
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+
+class CsvResultWriter:
+    """
+    Appends the summary, sector and location rows of each scraped snapshot to the CSV
+    outputs as soon as it completes, so nothing is held in memory until the end of a run.
+
+    With merge=True rows are appended to the existing files, and any older rows for
+    re-scraped timestamps are dropped when the writer is closed. Files whose rows arrived
+    out of timestamp order, as the rounds of adaptive sampling do, are sorted then too.
+    """
+
+    def __init__(self, scraper, base_filename, merge=False):
+        self.merge = merge
+        self.outputs = [
+            ('Summary results', f"{base_filename}_summary.csv", scraper.create_summary_dataframe),
+            ('Sector data', f"{base_filename}_sectors.csv", scraper.create_sector_dataframe),
+            ('Location data', f"{base_filename}_locations.csv", scraper.create_location_dataframe),
+        ]
+        # Files written so far, with the number of rows they held before this run
+        self.existing_rows = {}
+        self.last_timestamp = None
+        self.in_order = True
+
+    def write(self, result):
+        """
+        Append the rows of one result to each output
+        """
+        if self.last_timestamp is not None and result['timestamp'] < self.last_timestamp:
+            self.in_order = False
+        self.last_timestamp = result['timestamp']
+
+        for label, filename, build in self.outputs:
+            df = build([result])
+            if df.empty:
+                continue
+
+            if filename in self.existing_rows:
+                df.to_csv(filename, index=False, mode='a', header=False)
+                continue
+
+            # First rows for this file: start it afresh, or append after the rows kept by a merge
+            if self.merge and os.path.exists(filename):
+                self.existing_rows[filename] = len(
+                    pd.read_csv(filename, usecols=['timestamp']))
+                df.to_csv(filename, index=False, mode='a', header=False)
+            else:
+                self.existing_rows[filename] = 0
+                df.to_csv(filename, index=False)
+
+    def close(self):
+        """
+        Finish the outputs, returning (label, filename) for every file written
+        """
+        written = []
+
+        for label, filename, build in self.outputs:
+            if filename not in self.existing_rows:
+                continue
+
+            if self.existing_rows[filename] or not self.in_order:
+                self.merge_appended_rows(filename, self.existing_rows[filename])
+
+            written.append((label, filename))
+
+        return written
+
+    def merge_appended_rows(self, filename, existing_rows):
+        """
+        Drop older rows for timestamps scraped again in this run and sort the file by timestamp
+        """
+        df = pd.read_csv(filename, dtype={'timestamp': str})
+        existing_df = df.iloc[:existing_rows]
+        new_df = df.iloc[existing_rows:]
+
+        existing_df = existing_df[~existing_df['timestamp'].isin(new_df['timestamp'])]
+        pd.concat([existing_df, new_df], ignore_index=True).sort_values(
+            'timestamp', kind='stable').to_csv(filename, index=False)
+
+    def saved_dataframes(self):
+        """
+        The summary, sector and location tables as saved
+        """
+        return [read_saved_output(output[1]) for output in self.outputs]
+
+
+class ParquetResultWriter:
+    """
+    Writes the summary, sector and location outputs as Parquet files with typed columns:
+    an int64 timestamp, a real datetime, and a dictionary-encoded (categorical in pandas,
+    factor in R) sector or location.
+
+    Results are buffered and appended as one row group per `batch_size` snapshots.
+    Rows go to a .partial file that replaces the output when the writer is closed. With
+    merge=True, older rows for re-scraped timestamps are dropped from the existing file at that
+    point, and rows that arrived out of timestamp order are sorted.
+    """
+
+    def __init__(self, scraper, base_filename, merge=False, batch_size=500):
+        if pa is None:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+
+        self.merge = merge
+        self.batch_size = batch_size
+        self.outputs = [
+            ('Summary results', f"{base_filename}_summary.parquet",
+             scraper.create_summary_dataframe, self.summary_schema()),
+            ('Sector data', f"{base_filename}_sectors.parquet",
+             scraper.create_sector_dataframe, self.facet_schema('sector')),
+            ('Location data', f"{base_filename}_locations.parquet",
+             scraper.create_location_dataframe, self.facet_schema('location')),
+        ]
+        self.pending = []
+        # Open pq.ParquetWriter for each output, by output filename
+        self.writers = {}
+        self.last_timestamp = None
+        self.in_order = True
+
+    def summary_schema(self):
+        return pa.schema([
+            ('timestamp', pa.int64()),
+            ('date', pa.timestamp('s')),
+            ('permanent_jobs', pa.int64()),
+            ('interim_jobs', pa.int64()),
+            ('total_jobs', pa.int64()),
+            ('sectors_count', pa.int64()),
+            ('locations_count', pa.int64()),
+            ('wayback_url', pa.string()),
+        ])
+
+    def facet_schema(self, name_column):
+        return pa.schema([
+            ('timestamp', pa.int64()),
+            ('date', pa.timestamp('s')),
+            (name_column, pa.dictionary(pa.int32(), pa.string())),
+            ('job_count', pa.int64()),
+        ])
+
+    def write(self, result):
+        if self.last_timestamp is not None and result['timestamp'] < self.last_timestamp:
+            self.in_order = False
+        self.last_timestamp = result['timestamp']
+
+        self.pending.append(result)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Append the buffered results to each output as one row group
+        """
+        if not self.pending:
+            return
+
+        for label, filename, build, schema in self.outputs:
+            df = build(self.pending)
+            if df.empty:
+                continue
+
+            df['timestamp'] = df['timestamp'].astype('int64')
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d %H:%M:%S')
+            table = pa.Table.from_pandas(df, preserve_index=False).cast(schema)
+
+            if filename not in self.writers:
+                self.writers[filename] = pq.ParquetWriter(
+                    f"{filename}.partial", schema, compression='zstd')
+            self.writers[filename].write_table(table)
+
+        self.pending = []
+
+    def close(self):
+        """
+        Finish the outputs, returning (label, filename) for every file written
+        """
+        self.flush()
+        written = []
+
+        for label, filename, build, schema in self.outputs:
+            if filename not in self.writers:
+                continue
+
+            self.writers.pop(filename).close()
+            if self.merge and os.path.exists(filename):
+                self.merge_partial(filename)
+            else:
+                if not self.in_order:
+                    table = pq.read_table(f"{filename}.partial")
+                    pq.write_table(table.sort_by('timestamp'), f"{filename}.partial", compression='zstd')
+                os.replace(f"{filename}.partial", filename)
+
+            written.append((label, filename))
+
+        return written
+
+    def merge_partial(self, filename):
+        """
+        Replace the rows of the existing file for timestamps in the new rows, sorted by timestamp
+        """
+        new_table = pq.read_table(f"{filename}.partial")
+        existing_table = pq.read_table(filename)
+
+        replaced = pc.is_in(existing_table['timestamp'], value_set=new_table['timestamp'].combine_chunks())
+        table = pa.concat_tables([existing_table.filter(pc.invert(replaced)), new_table])
+
+        pq.write_table(table.sort_by('timestamp'), f"{filename}.partial", compression='zstd')
+        os.replace(f"{filename}.partial", filename)
+
+    def saved_dataframes(self):
+        """
+        The summary, sector and location tables as saved
+        """
+        return [read_saved_output(output[1]) for output in self.outputs]
+
+
+class SqliteResultWriter:
+    """
+    Upserts results into a ResultStore at <base_filename>.sqlite, one transaction per
+    `batch_size` snapshots.
+
+    The store is always updated in place: re-scraped timestamps replace their earlier rows
+    and every other snapshot is kept, so merge makes no difference.
+    """
+
+    def __init__(self, scraper, base_filename, merge=False, batch_size=500):
+        self.batch_size = batch_size
+        self.filename = f"{base_filename}.sqlite"
+        self.store = ResultStore(self.filename, {
+            facet: config['result_key'] for facet, config in scraper.FACETS.items()
+            if 'result_key' in config})
+        self.pending = []
+        self.written = 0
+
+    def write(self, result):
+        self.pending.append(result)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.written += self.store.upsert(self.pending)
+            self.pending = []
+
+    def close(self):
+        """
+        Finish the batch, returning (label, filename) for the store if anything was written.
+
+        With nothing written, saved_dataframes() is never called, so the store is closed here
+        """
+        self.flush()
+        if not self.written:
+            self.store.close()
+            return []
+        return [('Results store', self.filename)]
+
+    def saved_dataframes(self):
+        """
+        The summary, sector and location tables, read back from the whole store
+        """
+        dataframes = [self.store.summary_dataframe(),
+                      self.store.facet_dataframe('sector'),
+                      self.store.facet_dataframe('location')]
+        self.store.close()
+        return dataframes
@@ -0,0 +1,269 @@
+"""
+The facet extractors exactly as they stood in the baseline commit: one full-page
+html.parser walk per facet. They are kept here unchanged as the reference output the
+combined, pre-sliced extraction must reproduce.
+"""
+import re
+
+
+def find_section_header(soup, header_text):
+    """Find section header - handles both h4 and button elements"""
+    # Try h4 first (form 1)
+    header = soup.find('h4', string=re.compile(header_text, re.IGNORECASE))
+    if header:
+        return header
+
+    # Try button (form 2) - text might be nested inside
+    buttons = soup.find_all('button', class_='category-header')
+    for button in buttons:
+        if re.search(header_text, button.get_text(strip=True), re.IGNORECASE):
+            return button
+
+    return None
+
+
+def extract_job_type_counts(soup, timestamp):
+    """
+    Extract permanent and interim job counts from the HTML content
+    """
+    permanent_count = None
+    interim_count = None
+
+    # Look for the job type section - could be under different headers
+    possible_headers = ['Job type', 'Type', 'Employment type']
+
+    for header_text in possible_headers:
+        header = find_section_header(soup, header_text)
+        if header:
+            # Find the associated ul element
+            content_div = header.find_next_sibling('div')
+            if content_div:
+                filter_ul = content_div.find(
+                    'ul', class_='filter__items facet-links indent block lap-larger')
+
+                if filter_ul:
+                    filter_items = filter_ul.find_all(
+                        'li', class_='filter__item facet-links__link lap-larger__item')
+
+                    for item in filter_items:
+                        link = item.find('a')
+                        small_tag = item.find('small')
+
+                        if link and small_tag:
+                            href = link.get('href', '')
+                            text = link.get_text(strip=True).lower()
+                            count_text = small_tag.get_text(strip=True)
+
+                            # Extract number from count text
+                            count_match = re.search(r'\d+', count_text)
+                            if count_match:
+                                count = int(count_match.group())
+
+                                # Check if this is permanent jobs
+                                if 'permanent' in text and f'/web/{timestamp}/' in href:
+                                    permanent_count = count
+
+                                # Check if this is interim/contract jobs
+                                elif any(keyword in text for keyword in ['interim', 'contract', 'temp']) and f'/web/{timestamp}/' in href:
+                                    interim_count = count
+
+                    if permanent_count is not None and interim_count is not None:
+                        break
+
+    return permanent_count, interim_count
+
+
+def extract_sector_counts(soup, timestamp):
+    """
+    Extract job counts by sector
+    """
+    sector_counts = {}
+
+    # Look for the Sector header
+    sector_header = find_section_header(soup, 'Sector')
+
+    if sector_header:
+        # Find the associated content div
+        content_div = sector_header.find_next_sibling('div')
+        if content_div:
+            filter_ul = content_div.find(
+                'ul', class_='filter__items facet-links indent block lap-larger')
+
+            if filter_ul:
+                filter_items = filter_ul.find_all(
+                    'li', class_='filter__item facet-links__link lap-larger__item')
+
+                for item in filter_items:
+                    link = item.find('a')
+                    small_tag = item.find('small')
+
+                    if link and small_tag:
+                        href = link.get('href', '')
+                        sector_name = link.get_text(strip=True)
+                        count_text = small_tag.get_text(strip=True)
+
+                        # Extract number from count text
+                        count_match = re.search(r'\d+', count_text)
+                        if count_match and f'/web/{timestamp}/' in href:
+                            count = int(count_match.group())
+                            sector_counts[sector_name] = count
+
+    return sector_counts
+
+
+def extract_location_counts(soup, timestamp):
+    """
+    Extract job counts by location
+    """
+    location_counts = {}
+
+    # Look for the Location header
+    location_header = find_section_header(soup, 'Location')
+
+    if location_header:
+        # Find the associated content div
+        content_div = location_header.find_next_sibling('div')
+        if content_div:
+            filter_ul = content_div.find(
+                'ul', class_='filter__items facet-links indent block lap-larger')
+
+            if filter_ul:
+                filter_items = filter_ul.find_all(
+                    'li', class_='filter__item facet-links__link lap-larger__item')
+
+                for item in filter_items:
+                    link = item.find('a')
+                    small_tag = item.find('small')
+
+                    if link and small_tag:
+                        href = link.get('href', '')
+                        location_name = link.get_text(strip=True)
+                        count_text = small_tag.get_text(strip=True)
+
+                        # Skip "More..." links
+                        if 'more' in location_name.lower() or 'moreterms' in href:
+                            continue
+
+                        # Extract number from count text
+                        count_match = re.search(r'\d+', count_text)
+                        if count_match and f'/web/{timestamp}/' in href:
+                            count = int(count_match.group())
+                            location_counts[location_name] = count
+
+    return location_counts
+
+
+def extract_job_type_counts_legacy(soup, timestamp):
+    """
+    Extract permanent and interim job counts from the legacy HTML format
+    """
+    permanent_count = None
+    interim_count = None
+
+    # Look for the Contract Type header
+    contract_header = soup.find(
+        'h3', class_='collapsable', string=re.compile('Contract Type', re.IGNORECASE))
+
+    if contract_header:
+        # Find the associated div and ul
+        content_div = contract_header.find_next_sibling('div')
+        if content_div:
+            expand_list = content_div.find('ul', class_='expandList')
+
+            if expand_list:
+                list_items = expand_list.find_all('li')
+
+                for item in list_items:
+                    link = item.find('a')
+                    if link:
+                        href = link.get('href', '')
+                        text = link.get_text(strip=True).lower()
+
+                        # Look for count in parentheses after the link
+                        item_text = item.get_text()
+                        count_match = re.search(r'\((\d+)\)', item_text)
+
+                        if count_match and f'/web/{timestamp}/' in href:
+                            count = int(count_match.group(1))
+
+                            # Check if this is permanent jobs
+                            if 'permanent' in text or 'permanent' in href:
+                                permanent_count = count
+
+                            # Check if this is interim/contract jobs
+                            elif any(keyword in text for keyword in ['interim', 'contract', 'temp']) or 'interim-contract-and-temp' in href:
+                                interim_count = count
+
+    return permanent_count, interim_count
+
+
+def extract_sector_counts_legacy(soup, timestamp):
+    """
+    Extract job counts by sector from the legacy HTML format
+    """
+    sector_counts = {}
+
+    # Look for the Sector header
+    sector_header = soup.find(
+        'h3', class_='collapsable', string=re.compile('Sector', re.IGNORECASE))
+
+    if sector_header:
+        # Find the associated div and ul
+        content_div = sector_header.find_next_sibling('div')
+        if content_div:
+            expand_list = content_div.find('ul', class_='expandList')
+
+            if expand_list:
+                list_items = expand_list.find_all('li')
+
+                for item in list_items:
+                    link = item.find('a')
+                    if link:
+                        href = link.get('href', '')
+                        sector_name = link.get_text(strip=True)
+
+                        # Look for count in parentheses after the link
+                        item_text = item.get_text()
+                        count_match = re.search(r'\((\d+)\)', item_text)
+
+                        if count_match and f'/web/{timestamp}/' in href:
+                            count = int(count_match.group(1))
+                            sector_counts[sector_name] = count
+
+    return sector_counts
+
+
+def extract_location_counts_legacy(soup, timestamp):
+    """
+    Extract job counts by location from the legacy HTML format
+    """
+    location_counts = {}
+
+    # Look for the Location header
+    location_header = soup.find(
+        'h3', class_='collapsable', string=re.compile('Location', re.IGNORECASE))
+
+    if location_header:
+        # Find the associated div and ul
+        content_div = location_header.find_next_sibling('div')
+        if content_div:
+            expand_list = content_div.find('ul', class_='expandList')
+
+            if expand_list:
+                list_items = expand_list.find_all('li')
+
+                for item in list_items:
+                    link = item.find('a')
+                    if link:
+                        href = link.get('href', '')
+                        location_name = link.get_text(strip=True)
+
+                        # Look for count in parentheses after the link
+                        item_text = item.get_text()
+                        count_match = re.search(r'\((\d+)\)', item_text)
+
+                        if count_match and f'/web/{timestamp}/' in href:
+                            count = int(count_match.group(1))
+                            location_counts[location_name] = count
+
+    return location_counts
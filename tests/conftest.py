@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The scraper modules are flat scripts at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_archive import FakeArchive
+
+# One capture per layout era, a few days apart within each
+TIMESTAMPS = [
+    '20130513011407', '20140101120000', '20150601120000',
+    '20151207031149', '20160202113756', '20160304053501',
+    '20170101120000', '20200101120000', '20250116054205',
+]
+
+
+@pytest.fixture
+def archive():
+    archive = FakeArchive(TIMESTAMPS)
+    archive.start()
+    yield archive
+    archive.stop()
@@ -0,0 +1,145 @@
+import http.server
+import json
+import re
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from aj_bench import load_fixtures
+
+
+class FakeArchive:
+    """
+    Local stand-in for the Wayback Machine, serving the CDX index and snapshot pages.
+
+    CDX answers come as plain-text pages joined by resumeKey, or as one output=json
+    response. Each snapshot page is the fixture for its era, relinked to its own timestamp.
+    fail() makes a snapshot answer with error statuses (optionally with Retry-After) a
+    given number of times before it succeeds, and garble() corrupts a snapshot's encoding.
+    """
+
+    def __init__(self, timestamps, digests=None):
+        self.timestamps = sorted(timestamps)
+        # CDX payload digest of each timestamp; distinct pages unless set otherwise
+        self.digests = digests or {timestamp: f"sha1-{timestamp}" for timestamp in self.timestamps}
+        # Content-Type of CDX responses, or None to send none at all
+        self.cdx_content_type = 'text/plain'
+        self.failures = {}
+        self.garbled = set()
+        self.requests = []
+        self.lock = threading.Lock()
+        self.fixtures = {name: (recorded, html) for name, recorded, html in load_fixtures()}
+        self.server = None
+
+    def fail(self, timestamp, status, times=1, retry_after=None):
+        """
+        Answer the next `times` requests for a snapshot with `status`
+        """
+        self.failures.setdefault(timestamp, []).extend([(status, retry_after)] * times)
+
+    def garble(self, timestamp):
+        """
+        Serve a snapshot as UTF-8 with a byte that is not valid UTF-8 appended
+        """
+        self.garbled.add(timestamp)
+
+    def snapshot_requests(self, timestamp):
+        return [path for path in self.requests if path.startswith(f"/web/{timestamp}/")]
+
+    def page(self, timestamp):
+        if timestamp < '20151206':
+            name = 'synthetic_legacy_h3'
+        elif timestamp < '20170101':
+            name = 'synthetic_current_h4'
+        else:
+            name = 'synthetic_current_button'
+        recorded, html = self.fixtures[name]
+        return html.replace(f'/web/{recorded}/', f'/web/{timestamp}/')
+
+    def cdx(self, query):
+        timestamps = self.timestamps
+        if 'from' in query:
+            timestamps = [t for t in timestamps if t >= query['from'][0].ljust(14, '0')]
+        if 'to' in query:
+            timestamps = [t for t in timestamps if t[:len(query['to'][0])] <= query['to'][0]]
+
+        fields = query.get('fl', ['timestamp,original,statuscode'])[0].split(',')
+        rows = [[{'timestamp': t, 'original': 'https://www.theactuaryjobs.com/jobs/',
+                  'statuscode': '200', 'digest': self.digests[t]}[field] for field in fields]
+                for t in timestamps]
+
+        if query.get('output') == ['json']:
+            return json.dumps([fields] + rows)
+
+        limit = int(query.get('limit', ['0'])[0]) or len(rows)
+        start = int(query.get('resumeKey', ['0'])[0])
+        body = ''.join(' '.join(row) + '\n' for row in rows[start:start + limit])
+        if 'showResumeKey' in query and start + limit < len(rows):
+            body += f"\n{start + limit}\n"
+        return body
+
+    def handler(self):
+        archive = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, content_type='text/html', headers=()):
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                if content_type is not None:
+                    self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with archive.lock:
+                    archive.requests.append(self.path)
+
+                if url.path == '/cdx/search/cdx':
+                    return self.send(200, archive.cdx(parse_qs(url.query)), archive.cdx_content_type)
+
+                match = re.match(r'/web/(\d{14})/', url.path)
+                if match is None or match.group(1) not in archive.digests:
+                    return self.send(404, 'Not found')
+
+                timestamp = match.group(1)
+                with archive.lock:
+                    failures = archive.failures.get(timestamp)
+                    failure = failures.pop(0) if failures else None
+                if failure is not None:
+                    status, retry_after = failure
+                    headers = [('Retry-After', str(retry_after))] if retry_after is not None else []
+                    return self.send(status, 'Error', headers=headers)
+
+                if timestamp in archive.garbled:
+                    return self.send(200, archive.page(timestamp).encode('utf-8') + b'\xff',
+                                     'text/html; charset=utf-8')
+                self.send(200, archive.page(timestamp))
+
+        return Handler
+
+    def start(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def point(self, scraper):
+        """
+        Send a scraper's CDX and snapshot requests here instead of to the archive
+        """
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        scraper.base_url = f"{base}/web/"
+        scraper.wayback_api = f"{base}/cdx/search/cdx"
+        return scraper
@@ -0,0 +1,15 @@
+from aj_scrape_3 import WaybackJobScraper
+from aj_scrape_async import AsyncWaybackEngine
+from conftest import TIMESTAMPS
+
+
+def test_undecodable_snapshots_are_parsed_like_the_sync_scraper(archive):
+    archive.garble('20160202113756')
+
+    results = AsyncWaybackEngine(
+        archive.point(WaybackJobScraper()), requests_per_second=100, burst=10).run_scraper()
+    expected = list(archive.point(WaybackJobScraper()).run_scraper(delay=0))
+
+    assert [result['timestamp'] for result in results] == TIMESTAMPS
+    assert not [result for result in results if 'error' in result]
+    assert results == expected
@@ -0,0 +1,33 @@
+from aj_cache import CdxIndexCache
+from aj_scrape_3 import WaybackJobScraper
+from aj_scrape_async import AsyncWaybackEngine
+from conftest import TIMESTAMPS
+
+
+def cdx_requests(archive):
+    return [path for path in archive.requests if path.startswith('/cdx/')]
+
+
+def test_cdx_pages_are_read_without_a_content_type(archive):
+    archive.cdx_content_type = None
+    scraper = archive.point(WaybackJobScraper())
+    scraper.cdx_page_size = 4
+
+    assert scraper.find_available_snapshots() == TIMESTAMPS
+    assert len(cdx_requests(archive)) == 3
+
+
+def test_async_engine_pages_through_and_caches_the_index(archive, tmp_path):
+    def run():
+        scraper = archive.point(WaybackJobScraper(cdx_cache=CdxIndexCache(str(tmp_path))))
+        scraper.cdx_page_size = 4
+        return AsyncWaybackEngine(scraper, requests_per_second=100, burst=10).run_scraper()
+
+    results = run()
+    assert [result['timestamp'] for result in results] == TIMESTAMPS
+    assert not [result for result in results if 'error' in result]
+    assert len(cdx_requests(archive)) == 3
+
+    # A second run finds the index in the cache
+    assert [result['timestamp'] for result in run()] == TIMESTAMPS
+    assert len(cdx_requests(archive)) == 3
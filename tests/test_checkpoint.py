@@ -0,0 +1,41 @@
+from aj_checkpoint import CheckpointJournal
+from aj_scrape_3 import WaybackJobScraper
+from aj_scrape_retro import LegacyWaybackJobScraper
+
+TIMESTAMP = '20130513011407'
+
+
+def interrupted_run(scraper):
+    """
+    Leave the journal of a scraper holding a made-up result, as an interrupted run would
+    """
+    journal = CheckpointJournal().for_output(scraper.base_filename)
+    journal.record(scraper.snapshot_result(
+        TIMESTAMP, {'job_type': {'Permanent': 1}, 'sector': {}, 'location': {}}))
+    return journal
+
+
+def test_default_journal_follows_the_scraper(archive, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interrupted_run(WaybackJobScraper())
+
+    legacy = archive.point(LegacyWaybackJobScraper())
+    results = {result['timestamp']: result
+               for result in legacy.run_scraper(delay=0, checkpoint=CheckpointJournal())}
+
+    # The legacy scraper does not replay the other scraper's progress
+    assert results[TIMESTAMP]['permanent_jobs'] == 496
+    assert (tmp_path / 'wayback_job_stats_progress.jsonl').exists()
+
+
+def test_default_journal_is_replayed_by_its_own_scraper(archive, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interrupted_run(WaybackJobScraper())
+
+    scraper = archive.point(WaybackJobScraper())
+    results = {result['timestamp']: result
+               for result in scraper.run_scraper(delay=0, checkpoint=CheckpointJournal())}
+
+    assert results[TIMESTAMP]['permanent_jobs'] == 1
+    assert not archive.snapshot_requests(TIMESTAMP)
+    assert not (tmp_path / 'wayback_job_stats_progress.jsonl').exists()
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from aj_scrape_3 import WaybackJobScraper
+from conftest import TIMESTAMPS
+
+
+def scrape(archive, base_filename, format, date_range=(None, None), incremental=False):
+    scraper = archive.point(WaybackJobScraper(list(date_range)))
+    results = list(scraper.run_scraper(delay=0, incremental=incremental, base_filename=base_filename))
+    scraper.save_results(results, base_filename, merge=True, format=format)
+    return [result['timestamp'] for result in results]
+
+
+@pytest.mark.parametrize('format, other_format', [('csv', 'sqlite'), ('sqlite', 'csv')])
+def test_incremental_reads_only_the_target_output(archive, tmp_path, format, other_format):
+    base_filename = str(tmp_path / 'jobs')
+    # Another output next to it holds every snapshot, the target only the early ones
+    scrape(archive, base_filename, other_format)
+    scrape(archive, base_filename, format, date_range=(None, datetime(2015, 12, 31)))
+
+    scraped = scrape(archive, base_filename, format, incremental=format)
+
+    assert scraped == [timestamp for timestamp in TIMESTAMPS if timestamp >= '20160101']
+
+
+def test_incremental_true_means_csv(archive, tmp_path):
+    base_filename = str(tmp_path / 'jobs')
+    scrape(archive, base_filename, 'csv')
+
+    assert scrape(archive, base_filename, 'csv', incremental=True) == []
+
+
+def test_incremental_run_is_merged_on_save(archive, tmp_path):
+    base_filename = str(tmp_path / 'jobs')
+    scrape(archive, base_filename, 'csv', date_range=(None, datetime(2024, 12, 31)))
+
+    # Saved with the default merge, as a weekly refresh would be
+    scraper = archive.point(WaybackJobScraper())
+    scraper.save_results(scraper.run_scraper(delay=0, incremental=True, base_filename=base_filename),
+                         base_filename)
+
+    summary = scraper.load_saved_dataframe(f"{base_filename}_summary.csv")
+    assert list(summary['timestamp']) == TIMESTAMPS
+
+
+def test_saving_an_incremental_run_without_merge_warns(archive, tmp_path, caplog):
+    base_filename = str(tmp_path / 'jobs')
+    scraper = archive.point(WaybackJobScraper())
+    results = scraper.run_scraper(delay=0, incremental=True, base_filename=base_filename)
+
+    scraper.save_results(results, base_filename, merge=False)
+
+    assert 'merge=False' in caplog.text
@@ -0,0 +1,19 @@
+import logging
+
+from aj_metrics import ScraperMetrics
+
+
+def test_report_is_logged_as_one_message(caplog, capsys):
+    metrics = ScraperMetrics()
+    metrics.observe('20160202113756', 'fetch_seconds', 0.5)
+    metrics.observe('20160202113756', 'bytes', 2 ** 20)
+    metrics.count('20160202113756', 'retries')
+
+    with caplog.at_level(logging.INFO, logger='actuary_jobs'):
+        metrics.print_report()
+
+    assert capsys.readouterr().out == ''
+    [record] = caplog.records
+    assert 'SCRAPER METRICS' in record.message
+    assert 'Downloaded: 1.0 MiB in 1 responses' in record.message
+    assert 'retries: 1' in record.message
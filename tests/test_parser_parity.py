@@ -0,0 +1,131 @@
+import pytest
+from bs4 import BeautifulSoup
+
+import baseline_extractors as baseline
+from aj_bench import load_fixtures
+from aj_facets import FacetCanonicaliser
+from aj_scrape_3 import WaybackJobScraper
+from aj_scrape_retro import LegacyWaybackJobScraper
+
+BACKENDS = [
+    pytest.param(parser, marks=pytest.mark.skipif(
+        not WaybackJobScraper().parser_available(parser), reason=f"{parser} is not installed"))
+    for parser in WaybackJobScraper.PARSER_BACKENDS
+]
+
+
+def relink_first_item(html, timestamp, layout):
+    """
+    Point the first sidebar link at another capture, which every extractor must ignore
+    """
+    start = html.find(WaybackJobScraper.LAYOUTS[layout]['marker'])
+    position = html.find(f'/web/{timestamp}/', start)
+    return html[:position] + '/web/20000101000000/' + html[position + len(f'/web/{timestamp}/'):]
+
+
+def rename_job_types(html):
+    """
+    Give the legacy job types names without a keyword, leaving only their links to tell them apart
+    """
+    return html.replace('>Permanent</a>', '>Staff roles</a>').replace(
+        '>Interim, Contract and Temp</a>', '>Short engagements</a>')
+
+
+def add_masthead_button(html):
+    """
+    Put a button in the masthead, ahead of every sidebar header
+    """
+    return html.replace('<header class="masthead">',
+                        '<header class="masthead"><button class="masthead__menu" type="button">Menu</button>', 1)
+
+
+def pages():
+    scraper = WaybackJobScraper()
+    params = []
+    for name, timestamp, html in load_fixtures():
+        layout = scraper.detect_layout(html)
+        params.append(pytest.param(timestamp, html, id=name))
+        params.append(pytest.param(
+            timestamp, relink_first_item(html, timestamp, layout), id=f"{name}-foreign-link"))
+        if layout == 'current':
+            params.append(pytest.param(
+                timestamp, add_masthead_button(html), id=f"{name}-masthead-button"))
+        if layout == 'legacy':
+            params.append(pytest.param(
+                timestamp, rename_job_types(html), id=f"{name}-job-types-by-link"))
+    return params
+
+
+def baseline_output(html, timestamp):
+    """
+    (job type counts, sectors, locations) from the baseline's per-facet extractors
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    if WaybackJobScraper().detect_layout(html) == 'legacy':
+        return (baseline.extract_job_type_counts_legacy(soup, timestamp),
+                baseline.extract_sector_counts_legacy(soup, timestamp),
+                baseline.extract_location_counts_legacy(soup, timestamp))
+    return (baseline.extract_job_type_counts(soup, timestamp),
+            baseline.extract_sector_counts(soup, timestamp),
+            baseline.extract_location_counts(soup, timestamp))
+
+
+def sidebar_facets(scraper, html, timestamp):
+    """
+    Facets the way parse_snapshot extracts them: detected layout, pre-sliced sidebar
+    """
+    layout = scraper.detect_layout(html)
+    return scraper.extract_facets(scraper.parse_html(scraper.slice_sidebar(html, layout)), timestamp, layout)
+
+
+@pytest.mark.parametrize('parser', BACKENDS)
+@pytest.mark.parametrize('timestamp, html', pages())
+def test_backend_matches_html_parser_on_full_page(parser, timestamp, html):
+    reference = WaybackJobScraper(parser='html.parser')
+    layout = reference.detect_layout(html)
+    expected = reference.extract_facets(reference.parse_html(html), timestamp, layout)
+
+    facets = sidebar_facets(WaybackJobScraper(parser=parser), html, timestamp)
+
+    assert facets['job_type'] == expected['job_type']
+    assert facets['sector'] == expected['sector']
+    assert facets['location'] == expected['location']
+
+
+@pytest.mark.parametrize('parser', BACKENDS)
+@pytest.mark.parametrize('timestamp, html', pages())
+def test_backend_matches_baseline_extractors(parser, timestamp, html):
+    scraper = WaybackJobScraper(parser=parser)
+    # The baseline kept each layout's own names; compare before canonicalisation
+    scraper.canonicaliser = FacetCanonicaliser(aliases={})
+
+    job_types, sectors, locations = baseline_output(html, timestamp)
+    facets = sidebar_facets(scraper, html, timestamp)
+
+    assert scraper.job_type_counts(facets['job_type'], facets.get('job_type_kinds')) == job_types
+    assert facets['sector'] == sectors
+    assert facets['location'] == locations
+
+
+@pytest.mark.parametrize('timestamp, html', [page for page in pages() if 'foreign' not in page.id])
+def test_baseline_finds_every_facet(timestamp, html):
+    # The fixtures list every facet, so an empty baseline would make the parity checks vacuous
+    job_types, sectors, locations = baseline_output(html, timestamp)
+    assert None not in job_types and sectors and locations
+
+
+@pytest.mark.parametrize('timestamp, html', [page for page in pages() if 'foreign' not in page.id])
+def test_per_facet_methods_follow_the_scraper_layout(timestamp, html):
+    legacy = WaybackJobScraper().detect_layout(html) == 'legacy'
+    scraper = LegacyWaybackJobScraper() if legacy else WaybackJobScraper()
+    scraper.canonicaliser = FacetCanonicaliser(aliases={})
+    soup = scraper.parse_html(html)
+    walks = []
+    extract_facets = scraper.extract_facets
+    scraper.extract_facets = lambda *args: walks.append(args) or extract_facets(*args)
+
+    assert (scraper.extract_job_type_counts(soup, timestamp),
+            scraper.extract_sector_counts(soup, timestamp),
+            scraper.extract_location_counts(soup, timestamp)) == baseline_output(html, timestamp)
+    # The three calls on one soup share a single walk
+    assert len(walks) == 1
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from aj_records import SnapshotHistory
+from aj_scrape_3 import WaybackJobScraper
+
+
+def results(scraper):
+    yield scraper.snapshot_result('20160101120000', {
+        'job_type': {'Permanent': 300, 'Interim': 20},
+        'sector': {'Pensions': 120, 'Health': 8},
+        'location': {'Scotland': 30, 'Wales': 4},
+    })
+    yield scraper.error_result('20160102120000', 'timed out')
+    # No job type facet, and a count too large for 16 bits
+    yield scraper.snapshot_result('20160103120000', {
+        'job_type': {},
+        'sector': {'Pensions': 70000},
+        'location': {},
+    })
+    yield scraper.snapshot_result('20160104120000', {
+        'job_type': {'Permanent': 310, 'Interim': 25},
+        'sector': {'Investment': 12, 'Pensions': 125},
+        'location': {'Wales': 5},
+    })
+
+
+@pytest.fixture
+def scraper():
+    return WaybackJobScraper()
+
+
+def test_history_iterates_as_the_results(scraper):
+    expected = list(results(scraper))
+    assert list(SnapshotHistory(scraper, results(scraper))) == expected
+
+
+@pytest.mark.parametrize('build', ['create_summary_dataframe', 'create_sector_dataframe',
+                                   'create_location_dataframe'])
+def test_history_frames_match_the_results(scraper, build):
+    expected = getattr(scraper, build)(list(results(scraper)))
+    frame = getattr(scraper, build)(SnapshotHistory(scraper, results(scraper)))
+
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_history_widens_ids_past_16_bits(scraper):
+    history = SnapshotHistory(scraper)
+    for i in range(0x10000):
+        scraper.vocabulary.id('sector', f"Sector {i}")
+
+    history.extend(results(scraper))
+
+    assert history.ids.typecode == 'I' and history.counts.typecode == 'I'
+    assert list(history) == list(results(scraper))
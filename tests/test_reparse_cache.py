@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from aj_cache import SnapshotCache
+from aj_scrape_3 import WaybackJobScraper
+from conftest import TIMESTAMPS
+from fake_archive import FakeArchive
+
+
+def era(timestamp):
+    return 'legacy' if timestamp < '20151206' else 'h4' if timestamp < '20170101' else 'button'
+
+
+@pytest.fixture
+def unchanged_archive():
+    # Every capture of an era carries the same digest, as if the page never changed
+    archive = FakeArchive(TIMESTAMPS, digests={timestamp: f"sha1-{era(timestamp)}"
+                                               for timestamp in TIMESTAMPS})
+    archive.start()
+    yield archive
+    archive.stop()
+
+
+def rows(scraper, results):
+    return scraper.create_summary_dataframe(results).to_dict('records')
+
+
+@pytest.mark.parametrize('parse_workers', [None, 2])
+def test_reparse_rebuilds_captures_reused_by_digest(unchanged_archive, tmp_path, parse_workers):
+    scraper = unchanged_archive.point(WaybackJobScraper(cache=SnapshotCache(str(tmp_path))))
+    scraped = list(scraper.run_scraper(delay=0))
+
+    # Only the first capture of each era was fetched
+    assert scraper.metrics.counters['digest_reuses'] == len(TIMESTAMPS) - 3
+    assert len(scraper.cache.timestamps()) == 3
+
+    # A fresh scraper knows nothing of the CDX index, only the cache
+    reparser = unchanged_archive.point(WaybackJobScraper(cache=SnapshotCache(str(tmp_path))))
+    reparsed = list(reparser.reparse_cache(parse_workers=parse_workers))
+
+    assert len(reparsed) == len(scraped)
+    assert rows(reparser, reparsed) == rows(scraper, scraped)
+
+
+def test_reparse_keeps_to_the_date_range(unchanged_archive, tmp_path):
+    scraper = unchanged_archive.point(WaybackJobScraper(cache=SnapshotCache(str(tmp_path))))
+    list(scraper.run_scraper(delay=0))
+
+    # The range starts after the cached page its captures were rebuilt from
+    reparser = WaybackJobScraper([datetime(2016, 1, 1), datetime(2016, 12, 31)],
+                                 cache=SnapshotCache(str(tmp_path)))
+    reparsed = list(reparser.reparse_cache())
+
+    assert [result['timestamp'] for result in reparsed] == ['20160202113756', '20160304053501']
@@ -0,0 +1,85 @@
+import time
+
+from aj_rate_limit import CircuitBreaker, CircuitOpenError, RetryPolicy
+from aj_scrape_3 import WaybackJobScraper
+
+
+def make_scraper(archive, **breaker):
+    scraper = archive.point(WaybackJobScraper())
+    scraper.retry_policy = RetryPolicy(max_retries=4, backoff_base=0.01, backoff_max=2)
+    scraper.circuit_breaker = CircuitBreaker(**breaker)
+    return scraper
+
+
+def test_throttled_and_unavailable_snapshots_are_retried(archive):
+    archive.fail('20160202113756', 429, times=2, retry_after=0)
+    archive.fail('20170101120000', 503, times=1, retry_after=1)
+    archive.fail('20200101120000', 502, times=1)
+    scraper = make_scraper(archive)
+
+    start = time.monotonic()
+    results = list(scraper.run_scraper(delay=0))
+
+    assert [result['timestamp'] for result in results] == archive.timestamps
+    assert not [result for result in results if 'error' in result]
+    assert len(archive.snapshot_requests('20160202113756')) == 3
+    assert len(archive.snapshot_requests('20170101120000')) == 2
+    assert len(archive.snapshot_requests('20200101120000')) == 2
+    assert scraper.metrics.counters['retries'] == 4
+    # The Retry-After of the 503 is honoured rather than the shorter backoff
+    assert time.monotonic() - start >= 1
+
+
+def test_breaker_opens_after_failure_threshold(archive):
+    archive.fail('20160202113756', 503, times=10, retry_after=0)
+    scraper = make_scraper(archive, failure_threshold=3, reset_timeout=0.05, max_trips=1)
+
+    results = {result['timestamp']: result for result in scraper.run_scraper(delay=0)}
+
+    # Three consecutive failures trip the breaker, which then fails fast instead of retrying
+    assert len(archive.snapshot_requests('20160202113756')) == 3
+    assert scraper.circuit_breaker.trips == 1
+    assert 'Circuit open' in results['20160202113756']['error']
+    assert scraper.metrics.counters['errors'] >= 1
+
+
+def test_open_breaker_holds_requests_back(archive):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2, max_trips=3)
+    for _ in range(2):
+        breaker.record_failure()
+
+    start = time.monotonic()
+    breaker.before_request()
+    assert time.monotonic() - start >= 0.15
+
+    for _ in range(4):
+        breaker.record_failure()
+    try:
+        breaker.before_request()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("breaker should stay open after max_trips")
+
+
+
+def test_retried_responses_are_closed_before_backing_off(archive, caplog):
+    archive.fail('20160202113756', 429, times=2, retry_after=0)
+    scraper = make_scraper(archive)
+    responses = []
+    get = scraper.session.get
+
+    def recording_get(url, **kwargs):
+        response = get(url, **kwargs)
+        responses.append(response)
+        return response
+
+    scraper.session.get = recording_get
+    caplog.set_level('INFO', logger='actuary_jobs')
+    # Streamed like the CDX pages, so a response holds its connection until read or closed
+    response = scraper.get_with_retry(scraper.snapshot_url('20160202113756'), stream=True)
+
+    assert response.status_code == 200
+    assert [response.status_code for response in responses] == [429, 429, 200]
+    assert all(response.raw.closed for response in responses[:2])
+    assert "429 Client Error: Too Many Requests for url" in caplog.text
@@ -0,0 +1,24 @@
+import pytest
+
+from aj_bench import load_fixtures
+from aj_scrape_3 import WaybackJobScraper
+from test_parser_parity import add_masthead_button
+
+CURRENT_PAGES = [pytest.param(timestamp, html, id=name) for name, timestamp, html in load_fixtures()
+                 if WaybackJobScraper().detect_layout(html) == 'current']
+
+
+@pytest.mark.parametrize('timestamp, html', CURRENT_PAGES)
+def test_earlier_buttons_do_not_widen_the_slice(timestamp, html):
+    scraper = WaybackJobScraper()
+    sidebar = scraper.slice_sidebar(html)
+
+    assert sidebar.startswith(('<h4>Job type', '<button class="category-header"'))
+    assert scraper.slice_sidebar(add_masthead_button(html)) == sidebar
+
+
+def test_header_nested_in_a_button_is_kept_whole():
+    html = ('<button class="category-header"><h4>Job type</h4></button><div>'
+            '<ul class="filter__items facet-links indent block lap-larger"></ul></div>')
+
+    assert WaybackJobScraper().slice_sidebar(html) == html[:-len('</div>')]
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from aj_timestamps import (AdaptiveSampling, CalendarSampling, EveryNDays, MaxPerMonth,
+                           SamplingPolicy, TimestampIndex, sampling_policy)
+
+TIMESTAMPS = [
+    '20160101120000', '20160102120000', '20160105120000', '20160111120000',
+    '20160201000000', '20160215120000', '20160229235959', '20170301120000',
+]
+
+
+@pytest.fixture
+def index():
+    return TimestampIndex(reversed(TIMESTAMPS))
+
+
+def test_index_is_sorted(index):
+    assert list(index) == TIMESTAMPS
+    assert len(index) == len(TIMESTAMPS)
+    assert index[0] == TIMESTAMPS[0]
+
+
+@pytest.mark.parametrize('start, end, expected', [
+    (None, None, TIMESTAMPS),
+    ('2016', '2016', TIMESTAMPS[:7]),
+    ('201602', None, TIMESTAMPS[4:]),
+    (None, '201601', TIMESTAMPS[:4]),
+    # Full timestamps are inclusive at both ends
+    ('20160102120000', '20160201000000', TIMESTAMPS[1:5]),
+    (datetime(2016, 1, 2, 12), datetime(2016, 2, 1), TIMESTAMPS[1:5]),
+    ('2018', None, []),
+])
+def test_range(index, start, end, expected):
+    assert list(index.range(start, end)) == expected
+
+
+@pytest.mark.parametrize('period, expected', [
+    ('day', TIMESTAMPS),
+    # 4 January 2016 starts ISO week 1, so the 1st and 2nd fall in the last week of 2015
+    ('week', ['20160101120000', '20160105120000', '20160111120000', '20160201000000',
+              '20160215120000', '20160229235959', '20170301120000']),
+    ('month', ['20160101120000', '20160201000000', '20170301120000']),
+    ('year', ['20160101120000', '20170301120000']),
+])
+def test_sample(index, period, expected):
+    assert list(index.sample(period)) == expected
+
+
+def test_sample_rejects_unknown_periods(index):
+    with pytest.raises(ValueError):
+        index.sample('fortnight')
+
+
+def test_every_n_days(index):
+    assert EveryNDays(7).select(index) == [
+        '20160101120000', '20160111120000', '20160201000000', '20160215120000',
+        '20160229235959', '20170301120000']
+
+
+def test_max_per_month(index):
+    assert MaxPerMonth(1).select(index) == ['20160101120000', '20160201000000', '20170301120000']
+    # Spread over the month's captures: first and last of January's four
+    assert MaxPerMonth(2).select(index) == [
+        '20160101120000', '20160111120000', '20160201000000', '20160229235959', '20170301120000']
+
+
+def test_sampling_policy_accepts_names_and_policies(index):
+    assert sampling_policy(None).select(index) == TIMESTAMPS
+    assert sampling_policy('year').select(index) == CalendarSampling('year').select(index)
+    policy = EveryNDays(3)
+    assert sampling_policy(policy) is policy
+    assert SamplingPolicy().refine(index, {}) == []
+
+
+def test_adaptive_sampling_refines_only_where_totals_move():
+    index = TimestampIndex([f"2016{month:02d}{day:02d}120000"
+                            for month in range(1, 7) for day in (1, 8, 15, 22)])
+    policy = AdaptiveSampling(base_days=56, min_days=8, threshold=0.1)
+
+    selected = policy.select(index)
+    assert selected == ['20160101120000', '20160301120000', '20160501120000']
+
+    # Flat from January to March, a jump from March to May
+    totals = {'20160101120000': 100, '20160301120000': 105, '20160501120000': 200}
+    assert policy.refine(index, totals) == ['20160401120000']
+
+    totals['20160401120000'] = 150
+    assert policy.refine(index, totals) == ['20160315120000', '20160415120000']
+
+    # What is left moves little or spans less than 2 * min_days
+    totals.update({'20160315120000': 140, '20160415120000': 190})
+    assert policy.refine(index, totals) == []
+
+
+def test_adaptive_sampling_skips_failed_and_tried_snapshots():
+    index = TimestampIndex(['20160101120000', '20160115120000', '20160201120000'])
+    policy = AdaptiveSampling(base_days=28, min_days=7)
+
+    assert policy.refine(index, {'20160101120000': 100, '20160115120000': None,
+                                 '20160201120000': 200}) == []
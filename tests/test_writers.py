@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from aj_scrape_3 import WaybackJobScraper
+from aj_store import ResultStore
+from aj_timestamps import AdaptiveSampling
+from aj_writers import pa
+
+FORMATS = ['csv', pytest.param('parquet', marks=pytest.mark.skipif(pa is None, reason="pyarrow is not installed"))]
+
+
+def result(scraper, timestamp):
+    return scraper.snapshot_result(timestamp, {
+        'job_type': {'Permanent': int(timestamp[:4]), 'Interim': 1},
+        'sector': {'Pensions': 2, 'Health': 3},
+        'location': {'Scotland': 4},
+    })
+
+
+def saved_timestamps(scraper, base_filename, format):
+    return [[str(timestamp) for timestamp in df['timestamp']]
+            for df in scraper.RESULT_WRITERS[format](scraper, base_filename).saved_dataframes()]
+
+
+@pytest.mark.parametrize('format', FORMATS)
+@pytest.mark.parametrize('merge', [False, True])
+def test_rows_out_of_order_are_saved_sorted(tmp_path, format, merge):
+    scraper = WaybackJobScraper()
+    base_filename = str(tmp_path / 'jobs')
+    # A first round, then a refinement round in between
+    order = ['20150101000000', '20170101000000', '20190101000000', '20160101000000', '20180101000000']
+
+    scraper.save_results([result(scraper, timestamp) for timestamp in order], base_filename,
+                         merge=merge, format=format)
+
+    summary, sectors, locations = saved_timestamps(scraper, base_filename, format)
+    assert summary == sorted(order)
+    assert sectors == [timestamp for timestamp in sorted(order) for _ in range(2)]
+    assert locations == sorted(order)
+
+
+def test_adaptive_rounds_are_saved_in_timestamp_order(archive, tmp_path):
+    scraper = archive.point(WaybackJobScraper())
+    base_filename = str(tmp_path / 'jobs')
+    results = scraper.run_scraper(delay=0, sample=AdaptiveSampling(base_days=365, min_days=7, threshold=0))
+    scraper.save_results(results, base_filename)
+
+    summary = scraper.load_saved_dataframe(f"{base_filename}_summary.csv")
+    assert list(summary['timestamp']) == sorted(summary['timestamp'])
+    assert len(summary) > 5
+
+
+def test_sqlite_writer_closes_the_store_when_nothing_was_written(tmp_path):
+    scraper = WaybackJobScraper()
+    writer = scraper.RESULT_WRITERS['sqlite'](scraper, str(tmp_path / 'jobs'))
+    writer.write({'timestamp': '20160101000000', 'error': 'HTTP 503'})
+
+    assert writer.close() == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        writer.store.connection.execute('SELECT 1')
+
+
+def test_store_forgets_facet_ids_of_a_rolled_back_batch(tmp_path):
+    scraper = WaybackJobScraper()
+    store = ResultStore(str(tmp_path / 'jobs.sqlite'))
+    broken = result(scraper, '20160101000000')
+    # Rejected by the NOT NULL constraint once the facet values have been added
+    broken['sectors'] = {'Pensions': None}
+
+    with pytest.raises(sqlite3.IntegrityError):
+        store.upsert([broken])
+    assert store.facet_ids == {}
+
+    store.upsert([result(scraper, '20170101000000')])
+    assert list(store.facet_dataframe('sector')['sector']) == ['Pensions', 'Health']
+    store.close()